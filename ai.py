@@ -1,74 +1,565 @@
-import copy
-import random
-from move_validator import MoveValidator
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from pieces import PIECE_VALUES
+from position import Position, coords
+from transposition import TranspositionTable, SharedTranspositionTable, EXACT, LOWER, UPPER
+from move_ordering import MoveOrderer, MAX_PLY
+from see import static_exchange
+from evaluation import evaluate
+
+MATE_SCORE = 100000  # Bên hết nước đi (bị chiếu hết hoặc bí) thua
+MAX_DEPTH = 64
+INFINITY = MATE_SCORE + 1
+CHECK_INTERVAL = 1024  # Số nút giữa hai lần kiểm tra đồng hồ
+
+NULL_MOVE_REDUCTION = 2
+DELTA_MARGIN = 200  # Biên an toàn cho cắt tỉa delta trong tìm kiếm tĩnh
+ASPIRATION_WINDOW = 30
+
+
+def score_to_tt(score, ply):
+    """Điểm chiếu hết lưu vào bảng chuyển vị tính từ nút hiện tại thay vì từ gốc."""
+    if score > MATE_SCORE - MAX_PLY:
+        return score + ply
+    if score < -MATE_SCORE + MAX_PLY:
+        return score - ply
+    return score
+
+
+def score_from_tt(score, ply):
+    if score > MATE_SCORE - MAX_PLY:
+        return score - ply
+    if score < -MATE_SCORE + MAX_PLY:
+        return score + ply
+    return score
+
+
+def mate_in(score):
+    """Số nước (không phải nửa nước) đến chiếu hết theo bên đang đi: dương = thắng, âm = bị chiếu hết.
+
+    None nếu score không phải điểm chiếu hết.
+    """
+    if abs(score) < MATE_SCORE - MAX_PLY:
+        return None
+    plies = MATE_SCORE - abs(score)
+    return (plies + 1) // 2 if score > 0 else -(plies // 2)
+
+
+def principal_variation(ai, position, best_move, max_length):
+    """Biến chính: nước tốt nhất rồi lần theo nước lưu trong bảng chuyển vị, dừng khi gặp nước không hợp lệ hoặc lặp."""
+    pv = []
+    seen = {position.key}
+    undo = []
+    move = best_move
+    while move and len(pv) < max_length and move in position.generate_legal_moves():
+        undo.append((move, position.make_move(move)))
+        pv.append(move)
+        if position.key in seen:
+            break
+        seen.add(position.key)
+        entry = ai.tt.probe(position.key)
+        move = entry[3] if entry is not None else 0
+    for move, captured in reversed(undo):
+        position.unmake_move(move, captured)
+    return pv
+
+
+class SearchTimeout(Exception):
+    """Hết ngân sách thời gian/số nút giữa chừng một vòng lặp sâu dần."""
+
+
+class StopCondition:
+    """Điều kiện dừng cho ChessAI.stop_event: event được đặt, lần tìm kiếm đã bị thay, hoặc đã qua hạn chót.
+
+    event là threading.Event hoặc multiprocessing.Event; hạn chót (time.perf_counter(), 0 = không có) và mã lần
+    tìm kiếm hiện hành nằm trong multiprocessing.Value nên luồng hay tiến trình khác đều đặt được trong lúc đang
+    tìm kiếm. Bên tìm kiếm ghi mã lần mình đang chạy vào running_job; bên điều khiển đổi current_job để hủy nó
+    mà không phải xóa event dùng chung.
+    """
+
+    def __init__(self, event=None):
+        self.event = event if event is not None else threading.Event()
+        self.deadline = multiprocessing.Value('d', 0.0, lock=False)
+        self.current_job = multiprocessing.Value('q', 0, lock=False)
+        self.running_job = 0
+
+    def set_deadline(self, seconds):
+        """Dừng sau seconds giây kể từ bây giờ; None = bỏ hạn chót."""
+        self.deadline.value = time.perf_counter() + seconds if seconds is not None else 0.0
+
+    def set_job(self, job_id):
+        """Đặt lần tìm kiếm hiện hành; lần đang chạy với mã khác sẽ dừng."""
+        self.current_job.value = job_id
+
+    def is_set(self):
+        if self.event.is_set() or self.current_job.value != self.running_job:
+            return True
+        deadline = self.deadline.value
+        return deadline > 0 and time.perf_counter() >= deadline
+
+
+# Mỗi tiến trình con giữ một ChessAI riêng (và bảng chuyển vị riêng) suốt đời pool
+_worker_ai = None
+
+
+def _init_worker(tt_name, tt_size_mb):
+    global _worker_ai
+    _worker_ai = ChessAI(True, tt_size_mb, tt=SharedTranspositionTable.attach(tt_name, tt_size_mb))
+
+
+def _search_root_split(data, moves, depth, alpha, time_limit, node_limit):
+    """Chạy trong tiến trình con: tìm các nước gốc được chia ở một độ sâu bằng cửa sổ rỗng quanh alpha
+    (điểm của nước đầu do tiến trình chính tìm), chỉ tìm lại cửa sổ đầy đủ khi nước vượt alpha.
+    moves: [(thứ tự trong danh sách nước gốc, nước đi)].
+
+    Trả về (điểm, nước tốt nhất vượt alpha hoặc None, đã xong hết chưa, số liệu thống kê).
+    """
+    position = Position.from_bytes(data)
+    ai = _worker_ai
+    ai.reset_stats()
+    ai.tt.probes = ai.tt.hits = 0
+    ai.deadline = time.perf_counter() + time_limit if time_limit is not None else None
+    ai.node_limit = node_limit
+    ai.completed_depth = depth - 1  # Vòng lặp đầu luôn chạy hết như khi tìm tuần tự
+    best_score, best_move, finished = alpha, None, True
+    try:
+        for index, move in moves:
+            score = ai.search_root_move(position, move, depth, best_score, index)
+            if score > best_score:
+                best_score, best_move = score, move
+    except SearchTimeout:
+        finished = False
+    finally:
+        ai.deadline = None
+        ai.node_limit = None
+    return best_score, best_move, finished, (ai.nodes, ai.cutoffs, ai.first_move_cutoffs,
+                                             ai.tt.probes, ai.tt.hits)
+
 
 class ChessAI:
-    def __init__(self, is_red):
+    def __init__(self, is_red, tt_size_mb=16, workers=1, tt=None, book=None, tablebase=None):
         self.is_red = is_red  # AI là bên Đỏ hay Đen
+        self.book = book  # OpeningBook tra trước khi tìm kiếm (None = không dùng sách)
+        self.tablebase = tablebase  # Tablebase tra khi còn ít quân (None = không dùng)
+        self.tt_size_mb = tt_size_mb
+        self.workers = workers  # Số tiến trình tìm kiếm song song, 1 = tìm tuần tự
+        self.pool = None
+        self.nodes = 0  # Số nút đã duyệt trong lần tìm kiếm gần nhất
+        # Tìm song song thì mọi tiến trình con dùng chung một bảng trên bộ nhớ chia sẻ
+        if tt is None:
+            tt = SharedTranspositionTable(tt_size_mb) if workers > 1 else TranspositionTable(tt_size_mb)
+        self.tt = tt
+        self.deadline = None  # Thời điểm (time.perf_counter) phải dừng tìm kiếm
+        self.node_limit = None
+        self.stop_event = None  # Event (threading/multiprocessing) để dừng tìm kiếm từ bên ngoài
+        self.root_move = 0  # Nước tốt nhất của vòng lặp trước, thử đầu tiên ở gốc
+        self.completed_depth = 0
+        self.depth_results = []  # (độ sâu, điểm, nước đi) của từng vòng lặp đã hoàn tất
+        self.on_iteration = None  # Gọi sau mỗi vòng lặp sâu dần hoàn tất: on_iteration(độ sâu, điểm, nước đi)
+        self.orderer = MoveOrderer()
+        # Thống kê cắt tỉa: tỉ lệ cắt ở nước đầu tiên cho biết chất lượng sắp xếp nước đi
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
 
     def evaluate_board(self, red_pieces, black_pieces):
-        piece_values = {"帥": 1000, "將": -1000, "車": 90, "馬": 40, "象": 20, "相": -20,
-                        "士": 10, "仕": -10, "包": 45, "炮": -45, "卒": 5, "兵": -5}
-        score = 0
-        for pos, piece in red_pieces.items():
-            score += piece_values.get(piece, 0)
-        for pos, piece in black_pieces.items():
-            score += piece_values.get(piece, 0)
-        return score
+        return self.evaluate_position(Position.from_dicts(red_pieces, black_pieces))
+
+    def evaluate_position(self, position):
+        """Điểm theo góc nhìn bên Đỏ (vật chất + vị trí, cập nhật dần trong make/unmake)."""
+        return evaluate(position)
+
+    def evaluate(self, position):
+        """Điểm theo góc nhìn bên đang đi (dùng cho negamax)."""
+        score = self.evaluate_position(position)
+        return score if position.red_turn else -score
 
     def minimax(self, red_pieces, black_pieces, depth, alpha, beta, maximizing):
-        if depth == 0:
-            return self.evaluate_board(red_pieces, black_pieces), None
+        """Giữ giao diện cũ: điểm trả về theo góc nhìn bên Đỏ."""
+        position = Position.from_dicts(red_pieces, black_pieces, red_turn=maximizing)
+        self.reset_stats()
+        # Cửa sổ (alpha, beta) theo góc nhìn Đỏ -> theo bên đang đi
+        if not maximizing:
+            alpha, beta = -beta, -alpha
+        alpha = int(max(alpha, -INFINITY))
+        beta = int(min(beta, INFINITY))
+        value, move = self.search(position, depth, alpha, beta)
+        if not maximizing:
+            value = -value
+        if move is None:
+            return value, None
+        return value, (coords(move >> 8), coords(move & 0xFF))
+
+    def search(self, position, depth, alpha, beta, ply=0, allow_null=True):
+        """Negamax với PVS, cắt tỉa nước trống và giảm độ sâu nước muộn; điểm theo bên đang đi."""
+        self.nodes += 1
+        if self.nodes % CHECK_INTERVAL == 0:
+            self.check_limits()
+        if ply and position.is_repetition():
+            return 0, None  # Lặp lại thế cờ: coi như hòa
+        if ply and self.tablebase is not None:
+            score = self.probe_tablebase(position, ply)
+            if score is not None:
+                return score, None
+        if depth <= 0:
+            return self.quiescence(position, alpha, beta, ply), None
+
+        # Tra bảng chuyển vị: dùng điểm nếu đủ sâu, nếu không thì lấy nước tốt nhất để thử trước
+        original_alpha = alpha
+        entry = self.tt.probe(position.key)
+        tt_move = 0
+        if entry is not None:
+            tt_depth, tt_score, tt_flag, tt_move = entry
+            if tt_depth >= depth and tt_move and ply:
+                tt_score = score_from_tt(tt_score, ply)
+                if tt_flag == EXACT:
+                    return tt_score, tt_move
+                if tt_flag == LOWER and tt_score >= beta:
+                    return tt_score, tt_move
+                if tt_flag == UPPER and tt_score <= alpha:
+                    return tt_score, tt_move
+
+        side = position.side
+        in_check = position.in_check(side)
+
+        # Cắt tỉa nước trống: nhường lượt mà vẫn >= beta thì nút này gần như chắc chắn bị cắt.
+        # Không dùng khi bị chiếu, ở cửa sổ PV, hoặc khi bên đi không còn Xe/Mã/Pháo (dễ bị bắt buộc đi).
+        if (allow_null and ply and not in_check and depth >= 3 and beta - alpha == 1
+                and position.has_attackers(side) and self.evaluate(position) >= beta):
+            position.make_null_move()
+            try:
+                score = -self.search(position, depth - 1 - NULL_MOVE_REDUCTION, -beta, -beta + 1,
+                                     ply + 1, False)[0]
+            finally:
+                position.unmake_null_move()
+            if score >= beta:
+                return (beta if score < MATE_SCORE - MAX_PLY else score), None
+
+        moves = position.generate_legal_moves()
+        if not moves:
+            # Cờ tướng: bị chiếu hết hay hết nước đi đều thua; thua càng muộn càng tốt
+            return -MATE_SCORE + ply, None
+
+        first_move = self.root_move if ply == 0 and self.root_move else tt_move
+        moves = self.orderer.order(position, moves, ply, first_move)
+        killers = self.orderer.killers[ply] if ply < MAX_PLY else (0, 0)
 
         best_move = None
-        current_pieces = red_pieces if maximizing else black_pieces
-        other_pieces = black_pieces if maximizing else red_pieces
+        best_score = -INFINITY
+        for index, move in enumerate(moves):
+            captured = position.make_move(move)
+            try:
+                if index == 0:
+                    score = -self.search(position, depth - 1, -beta, -alpha, ply + 1)[0]
+                else:
+                    # Giảm độ sâu cho nước yên tĩnh xếp muộn (không ăn quân, không chiếu, không phải killer)
+                    reduction = 0
+                    if (depth >= 3 and index >= 3 and not captured and not in_check
+                            and move != killers[0] and move != killers[1]
+                            and not position.in_check(side ^ 1)):
+                        reduction = 1 if index < 8 else 2
+                    # PVS: thử bằng cửa sổ rỗng, chỉ tìm lại khi nước này có vẻ tốt hơn
+                    score = -self.search(position, depth - 1 - reduction, -alpha - 1, -alpha, ply + 1)[0]
+                    if reduction and score > alpha:
+                        score = -self.search(position, depth - 1, -alpha - 1, -alpha, ply + 1)[0]
+                    if alpha < score < beta:
+                        score = -self.search(position, depth - 1, -beta, -alpha, ply + 1)[0]
+            finally:
+                position.unmake_move(move, captured)  # Vẫn hoàn tác khi hết giờ giữa chừng
+
+            if score > best_score:
+                best_score, best_move = score, move
+                if score > alpha:
+                    alpha = score
+            if alpha >= beta:
+                self.cutoffs += 1
+                if index == 0:
+                    self.first_move_cutoffs += 1
+                self.orderer.record_cutoff(position, move, depth, ply)
+                break
 
-        best_value = float('-inf') if maximizing else float('inf')
+        if best_score <= original_alpha:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(position.key, depth, score_to_tt(best_score, ply), flag, best_move or 0)
+        return best_score, best_move
 
-        for pos, piece in list(current_pieces.items()):
-            valid_moves = MoveValidator.generate_valid_moves(piece, pos, current_pieces, other_pieces)
+    def probe_tablebase(self, position, ply):
+        """Điểm chính xác từ bảng tàn cuộc (theo bên đang đi), None nếu thế cờ không có trong bảng."""
+        pieces = len(position.piece_lists[0]) + len(position.piece_lists[1])
+        if pieces > self.tablebase.max_pieces:
+            return None
+        result = self.tablebase.probe(position)
+        if result is None:
+            return None
+        dtm, win = result
+        if win is None:
+            return 0
+        return MATE_SCORE - ply - dtm if win else -MATE_SCORE + ply + dtm
 
-            for new_pos in valid_moves:
-                # Kiểm tra xem new_pos có quân cùng màu không
-                if new_pos in current_pieces:
-                    continue  # Bỏ qua nước đi này
+    def quiescence(self, position, alpha, beta, ply):
+        """Tìm kiếm tĩnh: chỉ xét nước ăn quân cho đến khi thế cờ yên (tránh hiệu ứng chân trời)."""
+        self.nodes += 1
+        if self.nodes % CHECK_INTERVAL == 0:
+            self.check_limits()
+        side = position.side
+        in_check = position.in_check(side)
+        if ply >= MAX_PLY:
+            return self.evaluate(position)
 
-                new_current = copy.deepcopy(current_pieces)
-                new_other = copy.deepcopy(other_pieces)
+        if in_check:
+            # Đang bị chiếu thì không được "đứng yên": xét mọi nước thoát chiếu
+            moves = position.generate_legal_moves()
+            if not moves:
+                return -MATE_SCORE + ply
+            best_score = -INFINITY
+            stand_pat = None
+        else:
+            stand_pat = self.evaluate(position)
+            if stand_pat >= beta:
+                return stand_pat
+            if stand_pat > alpha:
+                alpha = stand_pat
+            best_score = stand_pat
+            board = position.board
+            moves = [move for move in position.generate_moves() if board[move & 0xFF]]
+        moves = self.orderer.order(position, moves, ply)
 
-                # Di chuyển quân
-                new_current[new_pos] = new_current.pop(pos)
+        board = position.board
+        for move in moves:
+            victim = board[move & 0xFF]
+            if stand_pat is not None:
+                victim_value = PIECE_VALUES[abs(victim)]
+                # Cắt tỉa delta: kể cả ăn được quân này vẫn không nâng nổi alpha
+                if stand_pat + victim_value + DELTA_MARGIN <= alpha:
+                    continue
+                # SEE: bỏ nước ăn thua thiệt khi quân ăn đắt hơn quân bị ăn
+                if PIECE_VALUES[abs(board[move >> 8])] > victim_value and static_exchange(position, move) < 0:
+                    continue
+            captured = position.make_move(move)
+            try:
+                if stand_pat is not None and position.in_check(side):
+                    continue  # Nước ăn không hợp lệ (để tướng mình bị chiếu)
+                score = -self.quiescence(position, -beta, -alpha, ply + 1)
+            finally:
+                position.unmake_move(move, captured)
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best_score
 
-                # Nếu ăn quân đối phương
-                if new_pos in new_other:
-                    new_other.pop(new_pos)
+    def reset_stats(self):
+        self.nodes = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
 
-                value, _ = self.minimax(
-                    new_current if maximizing else new_other,
-                    new_other if maximizing else new_current,
-                    depth - 1, alpha, beta, not maximizing
-                )
+    def stats(self):
+        """Thống kê của lần tìm kiếm gần nhất."""
+        return {
+            "nodes": self.nodes,
+            "depth": self.completed_depth,
+            "cutoffs": self.cutoffs,
+            "first_move_cutoff_rate": self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0,
+            "tt_hit_rate": self.tt.hit_rate(),
+        }
 
-                if maximizing and value > best_value:
-                    best_value, best_move = value, (pos, new_pos)
-                    alpha = max(alpha, value)
-                elif not maximizing and value < best_value:
-                    best_value, best_move = value, (pos, new_pos)
-                    beta = min(beta, value)
+    def check_limits(self):
+        # Vòng lặp đầu tiên luôn được chạy hết để luôn có nước đi
+        if not self.completed_depth:
+            return
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SearchTimeout()
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            raise SearchTimeout()
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise SearchTimeout()
 
-                if beta <= alpha:
+    def aspiration_search(self, position, depth, previous_score):
+        """Tìm ở gốc với cửa sổ hẹp quanh điểm vòng trước, nới rộng dần khi điểm rơi ra ngoài."""
+        if depth < 4:
+            return self.search(position, depth, -INFINITY, INFINITY)
+        window = ASPIRATION_WINDOW
+        alpha, beta = previous_score - window, previous_score + window
+        while True:
+            score, move = self.search(position, depth, alpha, beta)
+            if alpha < score < beta:
+                return score, move
+            window *= 4
+            if window > 1000:
+                return self.search(position, depth, -INFINITY, INFINITY)
+            if score <= alpha:
+                alpha = previous_score - window
+            else:
+                beta = previous_score + window
+
+    def iterative_deepening(self, position, max_depth=MAX_DEPTH, time_limit=None, node_limit=None):
+        """Tìm kiếm sâu dần 1, 2, ... đến max_depth hoặc hết ngân sách thời gian/số nút.
+
+        Trả về (điểm theo góc nhìn bên đang đi, nước đi) của vòng lặp hoàn tất cuối cùng.
+        """
+        if self.workers > 1:
+            return self.parallel_search(position, max_depth, time_limit, node_limit)
+        self.reset_stats()
+        self.orderer.age()
+        self.root_move = 0
+        self.completed_depth = 0
+        self.depth_results = []
+        self.deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        self.node_limit = node_limit
+        best_score, best_move = 0, None
+        try:
+            for depth in range(1, max_depth + 1):
+                try:
+                    score, move = self.aspiration_search(position, depth, best_score)
+                except SearchTimeout:
+                    break
+                best_score, best_move = score, move
+                self.root_move = move or 0
+                self.completed_depth = depth
+                self.depth_results.append((depth, score, move))
+                if self.on_iteration is not None:
+                    self.on_iteration(depth, score, move)
+                if move is None or abs(score) >= MATE_SCORE - MAX_PLY:
+                    break  # Hết nước đi hoặc đã thấy chiếu hết
+                try:
+                    self.check_limits()
+                except SearchTimeout:
+                    break
+        finally:
+            self.deadline = None
+            self.node_limit = None
+        return best_score, best_move
+
+    def search_root_move(self, position, move, depth, alpha=None, index=0):
+        """Điểm của một nước ở gốc. Có alpha thì thử cửa sổ rỗng trước (giảm độ sâu nước muộn như search),
+        chỉ tìm lại khi nước vượt alpha. index: thứ tự của nước trong danh sách nước gốc đã sắp xếp."""
+        side = position.side
+        in_check = index >= 3 and position.in_check(side)
+        captured = position.make_move(move)
+        try:
+            if alpha is None:
+                return -self.search(position, depth - 1, -INFINITY, INFINITY, 1)[0]
+            reduction = 0
+            if (depth >= 3 and index >= 3 and not captured and not in_check
+                    and move not in self.orderer.killers[0] and not position.in_check(side ^ 1)):
+                reduction = 1 if index < 8 else 2
+            score = -self.search(position, depth - 1 - reduction, -alpha - 1, -alpha, 1)[0]
+            if reduction and score > alpha:
+                score = -self.search(position, depth - 1, -alpha - 1, -alpha, 1)[0]
+            if score > alpha:
+                score = -self.search(position, depth - 1, -INFINITY, -alpha, 1)[0]
+            return score
+        finally:
+            position.unmake_move(move, captured)
+
+    def parallel_search(self, position, max_depth=MAX_DEPTH, time_limit=None, node_limit=None):
+        """Sâu dần, ở mỗi độ sâu tìm nước tốt nhất hiện tại tuần tự rồi chia các nước còn lại cho các tiến trình.
+
+        Các tiến trình tìm bằng cửa sổ rỗng quanh điểm của nước đầu nên phần lớn nước bị loại rất rẻ, thay vì
+        mỗi tiến trình tự sâu dần với cửa sổ riêng. Bảng chuyển vị dùng chung giữa mọi tiến trình.
+        """
+        moves = self.orderer.order(position, position.generate_legal_moves(), 0, self.root_move)
+        workers = min(self.workers, len(moves) - 1)
+        if workers <= 1:
+            saved, self.workers = self.workers, 1
+            try:
+                return self.iterative_deepening(position, max_depth, time_limit, node_limit)
+            finally:
+                self.workers = saved
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                            initargs=(self.tt.name, self.tt_size_mb))
+        data = position.to_bytes()
+        self.reset_stats()
+        self.tt.probes = self.tt.hits = 0
+        self.orderer.age()
+        self.root_move = 0
+        self.completed_depth = 0
+        self.depth_results = []
+        self.deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        self.node_limit = node_limit
+        best_score, best_move = 0, None
+        try:
+            for depth in range(1, max_depth + 1):
+                if best_move is not None:
+                    moves.remove(best_move)
+                    moves.insert(0, best_move)
+                try:
+                    first_score = self.search_root_move(position, moves[0], depth)
+                    self.check_limits()
+                except SearchTimeout:
+                    break
+                # Vòng đầu không giới hạn (như tìm tuần tự); các vòng sau chia phần còn lại của ngân sách
+                limited = self.completed_depth > 0
+                remaining = self.deadline - time.perf_counter() if limited and self.deadline is not None else None
+                share = (max(1, (node_limit - self.nodes) // workers)
+                         if limited and node_limit is not None else None)
+                rest = list(enumerate(moves[1:], start=1))
+                futures = [self.pool.submit(_search_root_split, data, rest[i::workers], depth, first_score,
+                                            remaining, share)
+                           for i in range(workers)]
+                score, move, finished = first_score, moves[0], True
+                for future in futures:
+                    split_score, split_move, split_finished, counts = future.result()
+                    self.nodes += counts[0]
+                    self.cutoffs += counts[1]
+                    self.first_move_cutoffs += counts[2]
+                    self.tt.probes += counts[3]
+                    self.tt.hits += counts[4]
+                    finished = finished and split_finished
+                    if split_move is not None and split_score > score:
+                        score, move = split_score, split_move
+                if not finished:
+                    # Nước đã tìm xong ở độ sâu dở dang mà tốt hơn nước đầu vẫn đáng tin hơn kết quả vòng trước
+                    if move != moves[0]:
+                        best_score, best_move = score, move
+                        self.root_move = move
+                    break
+                best_score, best_move = score, move
+                self.root_move = move
+                self.completed_depth = depth
+                self.depth_results.append((depth, score, move))
+                if self.on_iteration is not None:
+                    self.on_iteration(depth, score, move)
+                if abs(score) >= MATE_SCORE - MAX_PLY:
                     break
+                try:
+                    self.check_limits()
+                except SearchTimeout:
+                    break
+        finally:
+            self.deadline = None
+            self.node_limit = None
+        return best_score, best_move
+
+    def close(self):
+        """Tắt pool tiến trình con và giải phóng bảng chuyển vị dùng chung (gọi khi không dùng AI nữa)."""
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        if isinstance(self.tt, SharedTranspositionTable):
+            self.tt.close(unlink=True)
+
+    def book_move(self, position):
+        """Nước đi trong sách khai cuộc cho thế cờ này, 0 nếu không có."""
+        if self.book is None:
+            return 0
+        return self.book.choose(position)
 
-        return best_value, best_move
-
-    def get_best_move(self, red_pieces, black_pieces, depth=3):
-        _, best_move = self.minimax(
-            red_pieces,
-            black_pieces,
-            depth,
-            float('-inf'),
-            float('inf'),
-            self.is_red  # Đã sửa từ not self.is_red → self.is_red
-        )
-        return best_move
\ No newline at end of file
+    def get_best_move(self, red_pieces, black_pieces, depth=3, time_limit=None, node_limit=None):
+        """Nước đi tốt nhất cho bên AI; có time_limit/node_limit thì sâu dần đến depth trong ngân sách đó."""
+        position = Position.from_dicts(red_pieces, black_pieces, red_turn=self.is_red)
+        best_move = self.book_move(position)
+        if not best_move:
+            _, best_move = self.iterative_deepening(position, depth, time_limit, node_limit)
+        if best_move is None:
+            return None
+        return coords(best_move >> 8), coords(best_move & 0xFF)
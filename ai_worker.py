@@ -0,0 +1,182 @@
+import multiprocessing
+import threading
+from concurrent.futures import Future
+
+from ai import ChessAI, StopCondition
+from opening_book import OpeningBook
+from tablebase import Tablebase
+from position import Position, coords
+
+_PENDING = object()  # Kết quả nghĩ trước chưa về
+
+
+def _predicted_reply(ai, position, best_move):
+    """Nước đáp dự đoán của đối thủ: nước tốt nhất lưu trong bảng chuyển vị sau nước của AI."""
+    if best_move is None:
+        return 0
+    captured = position.make_move(best_move)
+    try:
+        entry = ai.tt.probe(position.key)
+        reply = entry[3] if entry is not None else 0
+        if reply and reply not in position.generate_legal_moves():
+            reply = 0
+    finally:
+        position.unmake_move(best_move, captured)
+    return reply
+
+
+def _worker_main(conn, stop, is_red, tt_size_mb):
+    """Vòng lặp của tiến trình tìm kiếm: nhận thế cờ qua pipe, trả về nước đi tốt nhất và nước đáp dự đoán."""
+    # Giữ nguyên giữa các nước nên bảng chuyển vị luôn "ấm"
+    ai = ChessAI(is_red, tt_size_mb, book=OpeningBook.open_default(), tablebase=Tablebase())
+    ai.stop_event = stop
+    while True:
+        try:
+            message = conn.recv()
+            # Chỉ làm yêu cầu mới nhất; các yêu cầu cũ hơn đã bị hủy khi yêu cầu sau được gửi
+            while message[0] != "quit" and conn.poll():
+                message = conn.recv()
+        except EOFError:
+            break
+        if message[0] == "quit":
+            break
+        _, job_id, data, depth, time_limit = message
+        stop.running_job = job_id
+        position = Position.from_bytes(data)
+        best_move = ai.book_move(position) or None
+        if best_move is None:
+            _, best_move = ai.iterative_deepening(position, depth, time_limit)
+        conn.send((job_id, best_move, _predicted_reply(ai, position, best_move)))
+    conn.close()
+
+
+class AIWorker:
+    """Chạy ChessAI trong tiến trình riêng để vòng lặp pygame không bị treo khi máy đang nghĩ.
+
+    request_move() trả về concurrent.futures.Future; vòng lặp chính chỉ cần kiểm tra done() mỗi khung hình.
+    Trong lượt của người chơi, ponder() cho máy nghĩ trước trên thế cờ sau nước đáp dự đoán.
+    """
+
+    def __init__(self, is_red, tt_size_mb=16):
+        self.is_red = is_red
+        self.conn, child_conn = multiprocessing.Pipe()
+        # Bị hủy (mã lần tìm kiếm đã đổi), hoặc đã qua hạn chót đặt sau một lần đoán trúng
+        self.stop = StopCondition(multiprocessing.Event())
+        self.process = multiprocessing.Process(target=_worker_main, daemon=True,
+                                               args=(child_conn, self.stop, is_red, tt_size_mb))
+        self.process.start()
+        child_conn.close()
+        self.lock = threading.Lock()
+        self.job_id = 0
+        self.future = None
+        self.predicted_reply = 0  # Nước đáp dự đoán từ lần tìm kiếm gần nhất
+        # Nghĩ trước: khóa Zobrist của thế cờ đang nghĩ và kết quả (nếu đã xong)
+        self.ponder_key = None
+        self.ponder_move = 0  # Nước đáp đang được giả định khi nghĩ trước
+        self.ponder_result = _PENDING
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+        self.reader = threading.Thread(target=self._read_results, daemon=True)
+        self.reader.start()
+
+    @staticmethod
+    def _resolve(future, best_move):
+        if best_move is None:
+            future.set_result(None)
+        else:
+            future.set_result((coords(best_move >> 8), coords(best_move & 0xFF)))
+
+    def _read_results(self):
+        while True:
+            try:
+                job_id, best_move, reply = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            with self.lock:
+                # Kết quả của yêu cầu đã bị hủy thì bỏ qua
+                if job_id != self.job_id:
+                    continue
+                self.predicted_reply = reply
+                if self.future is None:
+                    if self.ponder_key is not None:
+                        self.ponder_result = best_move  # Dùng ngay nếu người chơi đi đúng nước dự đoán
+                    continue
+                future, self.future = self.future, None
+            self._resolve(future, best_move)
+
+    def _send(self, position, depth, time_limit):
+        # Gọi khi đang giữ self.lock
+        self.job_id += 1
+        self.stop.set_deadline(None)
+        self.stop.set_job(self.job_id)
+        self.conn.send(("search", self.job_id, position.to_bytes(), depth, time_limit))
+
+    def request_move(self, red_pieces, black_pieces, depth=3, time_limit=None):
+        """Bắt đầu tìm nước đi cho bên AI ở nền, trả về Future chứa ((x, y), (x, y)) hoặc None."""
+        position = Position.from_dicts(red_pieces, black_pieces, red_turn=self.is_red)
+        future = Future()
+        with self.lock:
+            if self.ponder_key is not None:
+                if self.ponder_key == position.key:
+                    # Đoán trúng: lần nghĩ trước trở thành lần tìm kiếm thật, giờ mới bắt đầu tính giờ
+                    self.ponder_hits += 1
+                    self.ponder_key = None
+                    best_move, self.ponder_result = self.ponder_result, _PENDING
+                    if best_move is _PENDING:
+                        if time_limit is not None:
+                            self.stop.set_deadline(time_limit)
+                        self.future = future
+                    else:
+                        self._resolve(future, best_move)
+                    return future
+                self.ponder_misses += 1
+        self.cancel()
+        with self.lock:
+            self.future = future
+            self._send(position, depth, time_limit)
+        return future
+
+    def ponder(self, red_pieces, black_pieces, depth=3):
+        """Nghĩ trước trong lượt người chơi trên thế cờ sau nước đáp dự đoán (không giới hạn thời gian).
+
+        Trả về True nếu có nước dự đoán để nghĩ trước.
+        """
+        self.cancel()
+        position = Position.from_dicts(red_pieces, black_pieces, red_turn=not self.is_red)
+        with self.lock:
+            reply = self.predicted_reply
+            if not reply or reply not in position.generate_legal_moves():
+                return False
+            position.make_move(reply)
+            self.ponder_move = reply
+            self.ponder_key = position.key
+            self.ponder_result = _PENDING
+            self._send(position, depth, None)
+        return True
+
+    def cancel(self):
+        """Dừng lần tìm kiếm hoặc nghĩ trước đang chạy (nếu có) và hủy Future tương ứng."""
+        with self.lock:
+            if self.future is None and self.ponder_key is None:
+                return
+            future, self.future = self.future, None
+            self.ponder_key = None
+            self.ponder_result = _PENDING
+            self.job_id += 1
+            # Tiến trình con dừng lần đang chạy vì mã của nó không còn là mã hiện hành
+            self.stop.set_job(self.job_id)
+        if future is not None:
+            future.cancel()
+
+    def close(self):
+        """Hủy tìm kiếm và tắt tiến trình con (khi thoát hoặc hết ván)."""
+        self.cancel()
+        self.stop.event.set()
+        try:
+            self.conn.send(("quit",))
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=1.0)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
@@ -0,0 +1,138 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from ai import ChessAI, mate_in, principal_variation
+from position import Position, move_to_iccs
+
+# Phân tích hàng loạt không cần pygame: đọc dần file FEN/EPD (mỗi dòng một thế cờ), chia cho pool tiến trình
+# và ghi mỗi thế cờ một dòng JSON theo đúng thứ tự đầu vào.
+
+WINDOW_PER_WORKER = 4  # Số thế cờ đang chờ tối đa cho mỗi tiến trình: giữ bộ nhớ phẳng mà pool không rảnh
+
+
+def parse_line(line):
+    """Tách một dòng FEN hoặc EPD thành (fen, ops). ops là dict các lệnh EPD, ví dụ {"bm": "h2e2", "id": "p1"}."""
+    fields = line.split()
+    fen = " ".join(fields[:2])
+    rest = fields[2:]
+    # Bỏ hai trường nhập thành/bắt tốt qua đường (luôn '-' trong cờ tướng) và hai bộ đếm nước của FEN
+    for _ in range(2):
+        if rest and rest[0] == "-":
+            rest = rest[1:]
+    if len(rest) >= 2 and rest[0].isdigit() and rest[1].isdigit():
+        rest = rest[2:]
+    ops = {}
+    for op in " ".join(rest).split(";"):
+        name, _, value = op.strip().partition(" ")
+        if name:
+            ops[name] = value.strip().strip('"')
+    return fen, ops
+
+
+def read_positions(stream):
+    """Đọc dần các dòng thế cờ, bỏ dòng trống và dòng chú thích '#'. Sinh (fen, ops)."""
+    for line in stream:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield parse_line(line)
+
+
+# Mỗi tiến trình con giữ một ChessAI suốt đời pool, bảng chuyển vị được xóa trước mỗi thế cờ
+_analyzer = None
+
+
+def _init_analyzer(tt_size_mb):
+    global _analyzer
+    _analyzer = ChessAI(True, tt_size_mb)
+
+
+def analyze_position(fen, ops, depth, time_limit, node_limit):
+    """Phân tích một thế cờ (chạy trong tiến trình con), trả về dict kết quả có thể ghi ra JSON."""
+    result = {"fen": fen}
+    if "id" in ops:
+        result["id"] = ops["id"]
+    try:
+        position = Position.from_fen(fen)
+    except ValueError as error:
+        result["error"] = str(error)
+        return result
+    ai = _analyzer
+    # Xóa bảng chuyển vị và killer/lịch sử sắp xếp nước đi để kết quả không phụ thuộc vào thế cờ nào
+    # được phân tích trước trên cùng tiến trình
+    ai.tt.clear()
+    ai.orderer.clear()
+    start = time.perf_counter()
+    score, best_move = ai.iterative_deepening(position, depth, time_limit, node_limit)
+    result["time"] = round(time.perf_counter() - start, 3)
+    result["bestmove"] = move_to_iccs(best_move) if best_move is not None else None
+    result["score"] = score
+    if mate_in(score) is not None:
+        result["mate"] = mate_in(score)
+    result["depth"] = ai.completed_depth
+    result["pv"] = [move_to_iccs(move) for move in principal_variation(ai, position, best_move, ai.completed_depth)]
+    result["nodes"] = ai.nodes
+    if "bm" in ops:
+        result["solved"] = result["bestmove"] in ops["bm"].split()
+    return result
+
+
+def analyze(positions, out, depth=64, time_limit=None, node_limit=None, workers=None, tt_size_mb=16):
+    """Phân tích các thế cờ (iterable (fen, ops)) trên pool tiến trình, ghi NDJSON vào out theo thứ tự đầu vào.
+
+    Chỉ có tối đa workers * WINDOW_PER_WORKER thế cờ đang chờ nên bộ nhớ không tăng theo kích thước đầu vào.
+    Trả về số thế cờ đã phân tích.
+    """
+    workers = workers or os.cpu_count() or 1
+    window = workers * WINDOW_PER_WORKER
+    pending = deque()
+    count = 0
+    with ProcessPoolExecutor(workers, initializer=_init_analyzer, initargs=(tt_size_mb,)) as pool:
+        for fen, ops in positions:
+            if len(pending) >= window:
+                out.write(json.dumps(pending.popleft().result(), ensure_ascii=False) + "\n")
+                count += 1
+            pending.append(pool.submit(analyze_position, fen, ops, depth, time_limit, node_limit))
+        while pending:
+            out.write(json.dumps(pending.popleft().result(), ensure_ascii=False) + "\n")
+            count += 1
+    out.flush()
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Phân tích hàng loạt thế cờ từ file FEN/EPD, ghi NDJSON")
+    parser.add_argument("input", nargs="?", default="-", help="file FEN/EPD, '-' là stdin")
+    parser.add_argument("-o", "--output", default="-", help="file NDJSON, '-' là stdout")
+    parser.add_argument("-d", "--depth", type=int, default=None, help="độ sâu tối đa (mặc định: 64)")
+    parser.add_argument("-t", "--time", type=float, help="giây cho mỗi thế cờ")
+    parser.add_argument("--nodes", type=int, help="số nút tối đa cho mỗi thế cờ")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="số tiến trình (mặc định: số nhân)")
+    parser.add_argument("--tt-size", type=int, default=16, help="MB bảng chuyển vị mỗi tiến trình")
+    args = parser.parse_args(argv)
+    if args.time is None and args.nodes is None and args.depth is None:
+        parser.error("cần ít nhất một giới hạn: --depth, --time hoặc --nodes")
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        start = time.perf_counter()
+        depth = args.depth if args.depth is not None else 64
+        count = analyze(read_positions(source), out, depth, args.time, args.nodes, args.workers, args.tt_size)
+        elapsed = time.perf_counter() - start
+        print("%d positions in %.1fs (%.1f/s)" % (count, elapsed, count / elapsed if elapsed else 0.0),
+              file=sys.stderr)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+import argparse
+import importlib
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from ai import ChessAI
+from opening_book import OpeningBook
+from position import Position
+from tablebase import Tablebase
+from timer_manager import TimerManager
+
+# Đấu tự động giữa hai cấu hình ChessAI, không cần pygame. Mỗi cấu hình là một dict, ví dụ
+# {"name": "d4", "depth": 4, "time": 0.5, "tt_size_mb": 16, "book": False, "tablebase": True,
+#  "eval": "evaluation:evaluate"}; "time" là giây mỗi nước (bỏ qua khi dùng đồng hồ).
+
+MAX_PLIES = 300  # Quá số nửa nước này thì xử hòa
+REPETITIONS = 3  # Lặp lại thế cờ 3 lần thì xử hòa (chưa xét luật cấm chiếu/đuổi dai)
+
+
+def make_engine(config, is_red):
+    ai = ChessAI(is_red, config.get("tt_size_mb", 16),
+                 book=OpeningBook.open_default() if config.get("book") else None,
+                 tablebase=Tablebase() if config.get("tablebase") else None)
+    if config.get("eval"):
+        module, name = config["eval"].split(":")
+        ai.evaluate_position = getattr(importlib.import_module(module), name)
+    return ai
+
+
+def opening_moves(seed, plies):
+    """Khai cuộc ngẫu nhiên nhưng lặp lại được: theo sách nếu có, không thì chọn nước hợp lệ ngẫu nhiên."""
+    rng = random.Random(seed)
+    book = OpeningBook.open_default()
+    position = Position.initial()
+    moves = []
+    for _ in range(plies):
+        move = book.choose(position, rng) if book is not None else 0
+        if not move:
+            legal = position.generate_legal_moves()
+            if not legal:
+                break
+            move = rng.choice(legal)
+        position.make_move(move)
+        moves.append(move)
+    if book is not None:
+        book.close()
+    return moves
+
+
+def play_game(red_config, black_config, opening, clock=None, moves_to_go=30, max_plies=MAX_PLIES):
+    """Chơi một ván, trả về dict: result (1 Đỏ thắng, 0.5 hòa, 0 Đen thắng), lý do, số nửa nước, thời gian nghĩ."""
+    engines = (make_engine(red_config, True), make_engine(black_config, False))
+    configs = (red_config, black_config)
+    position = Position.initial()
+    timer = TimerManager(clock) if clock else None
+    for move in opening:
+        position.make_move(move)
+        if timer:
+            timer.switch_turn()
+    think_time = [0.0, 0.0]
+    moves_made = [0, 0]
+    result, reason = 0.5, "max plies"
+    while len(position.history) < max_plies:
+        side = position.side
+        if not position.generate_legal_moves():
+            result, reason = (0.0 if side == 0 else 1.0), "no legal moves"
+            break
+        if position.repetition_count() >= REPETITIONS - 1:
+            result, reason = 0.5, "repetition"
+            break
+        config = configs[side]
+        if timer:
+            timer.update_timers()
+            time_limit = timer.move_budget(side == 0, moves_to_go)
+        else:
+            time_limit = config.get("time")
+        start = time.perf_counter()
+        move = engines[side].book_move(position)
+        if not move:
+            _, move = engines[side].iterative_deepening(position, config.get("depth", 64), time_limit)
+        think_time[side] += time.perf_counter() - start
+        moves_made[side] += 1
+        if timer:
+            timer.update_timers()
+            if timer.get_times()[side] <= 0:
+                result, reason = (0.0 if side == 0 else 1.0), "time forfeit"
+                break
+            timer.switch_turn()
+        position.make_move(move)
+    return {"result": result, "reason": reason, "plies": len(position.history),
+            "think_time": think_time, "moves": moves_made}
+
+
+def _play_pair_game(index, config_a, config_b, opening, clock, moves_to_go, max_plies):
+    # Ván chẵn: A cầm Đỏ; ván lẻ: đổi màu trên cùng khai cuộc
+    a_is_red = index % 2 == 0
+    red, black = (config_a, config_b) if a_is_red else (config_b, config_a)
+    game = play_game(red, black, opening, clock, moves_to_go, max_plies)
+    game["index"] = index
+    game["a_score"] = game["result"] if a_is_red else 1.0 - game["result"]
+    a_side = 0 if a_is_red else 1
+    game["a_time"], game["b_time"] = game["think_time"][a_side], game["think_time"][a_side ^ 1]
+    game["a_moves"], game["b_moves"] = game["moves"][a_side], game["moves"][a_side ^ 1]
+    return game
+
+
+def elo_difference(wins, draws, losses, z=1.96):
+    """Chênh lệch Elo của A so với B và khoảng tin cậy 95% (Elo thấp, Elo cao).
+
+    Khoảng Wilson trên tỉ lệ điểm (hòa tính nửa điểm): không co về độ rộng 0 khi mọi ván cùng kết quả, và đầu
+    mút là vô cùng khi A thắng (hoặc thua) hết. Coi mỗi ván hai kết quả nên khoảng hơi rộng hơn thật khi có hòa.
+    """
+    n = wins + draws + losses
+    if not n:
+        return 0.0, -math.inf, math.inf
+    p = (wins + draws / 2) / n
+    k = z * z / n
+    center = (p + k / 2) / (1 + k)
+    half = z / (1 + k) * math.sqrt(p * (1 - p) / n + k / (4 * n))
+
+    def to_elo(p):
+        if p <= 0:
+            return -math.inf
+        if p >= 1:
+            return math.inf
+        return 400 * math.log10(p / (1 - p))
+
+    return to_elo(p), to_elo(center - half), to_elo(center + half)
+
+
+def run_match(config_a, config_b, games, workers=None, clock=None, moves_to_go=30,
+              opening_plies=4, max_plies=MAX_PLIES, seed=0, out=sys.stdout):
+    """Chơi games ván song song trên pool tiến trình, in kết quả từng ván và tổng kết, trả về dict thống kê."""
+    workers = workers or os.cpu_count() or 1
+    results = []
+    with ProcessPoolExecutor(workers) as pool:
+        futures = []
+        for index in range(games):
+            opening = opening_moves(seed + index // 2, opening_plies)
+            futures.append(pool.submit(_play_pair_game, index, config_a, config_b, opening,
+                                       clock, moves_to_go, max_plies))
+        for future in as_completed(futures):
+            game = future.result()
+            results.append(game)
+            if out:
+                out.write("game %3d  %s  %-14s %3d plies\n" % (
+                    game["index"] + 1, {1.0: "1-0", 0.5: "1/2", 0.0: "0-1"}[game["a_score"]],
+                    game["reason"], game["plies"]))
+    wins = sum(1 for g in results if g["a_score"] == 1.0)
+    draws = sum(1 for g in results if g["a_score"] == 0.5)
+    losses = len(results) - wins - draws
+    elo, elo_low, elo_high = elo_difference(wins, draws, losses)
+    a_moves = sum(g["a_moves"] for g in results)
+    b_moves = sum(g["b_moves"] for g in results)
+    summary = {
+        "wins": wins, "draws": draws, "losses": losses, "elo": elo, "elo_low": elo_low, "elo_high": elo_high,
+        "a_time_per_move": sum(g["a_time"] for g in results) / a_moves if a_moves else 0.0,
+        "b_time_per_move": sum(g["b_time"] for g in results) / b_moves if b_moves else 0.0,
+    }
+    if out:
+        out.write("%s vs %s: +%d =%d -%d  Elo %+.1f (95%% %+.1f .. %+.1f)  time/move %.3fs vs %.3fs\n" % (
+            config_a.get("name", "A"), config_b.get("name", "B"), wins, draws, losses, elo, elo_low, elo_high,
+            summary["a_time_per_move"], summary["b_time_per_move"]))
+    return summary
+
+
+def parse_config(text, name):
+    """'depth=4,time=0.5,book=1' -> dict cấu hình."""
+    config = {"name": name}
+    for item in filter(None, text.split(",")):
+        key, _, value = item.partition("=")
+        if key in ("depth", "tt_size_mb"):
+            config[key] = int(value)
+        elif key == "time":
+            config[key] = float(value)
+        elif key in ("book", "tablebase"):
+            config[key] = value not in ("0", "false", "no")
+        else:
+            config[key] = value
+    return config
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Đấu tự động giữa hai cấu hình AI (không cần pygame)")
+    parser.add_argument("-a", default="depth=4", help="cấu hình A, ví dụ depth=4,time=0.5,book=1")
+    parser.add_argument("-b", default="depth=3", help="cấu hình B")
+    parser.add_argument("-n", "--games", type=int, default=10)
+    parser.add_argument("-j", "--workers", type=int, default=None, help="số ván chạy song song (mặc định: số nhân)")
+    parser.add_argument("--clock", type=float, help="thời gian mỗi bên (giây), chia nước như TimerManager.move_budget")
+    parser.add_argument("--moves-to-go", type=int, default=30)
+    parser.add_argument("--opening-plies", type=int, default=4)
+    parser.add_argument("--max-plies", type=int, default=MAX_PLIES)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    run_match(parse_config(args.a, "A"), parse_config(args.b, "B"), args.games, args.workers, args.clock,
+              args.moves_to_go, args.opening_plies, args.max_plies, args.seed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+from array import array
+
+from pieces import (FILES, RANKS, NUM_SQUARES, EMPTY, RED, BLACK,
+                    KING, ADVISOR, ELEPHANT, HORSE, ROOK, CANNON, PAWN)
+from move_tables import HORSE_MOVES, HORSE_ATTACKERS, ELEPHANT_MOVES, ADVISOR_MOVES, KING_MOVES, PAWN_MOVES, PAWN_ATTACKERS
+
+# Bitboard 90 bit bằng số nguyên Python.
+#  - Bitboard theo hàng: bit = y * 9 + x (trùng chỉ số ô).
+#  - Bitboard theo cột: bit = x * 10 + y, chỉ dùng cho chiếm chỗ để tra bảng tấn công theo cột.
+# Trên Python bộ sinh này chậm hơn bảng nước đi của move_tables (perft 4: ~160k so với ~190k nút/giây)
+# nên tìm kiếm và MoveValidator không dùng nó; chỉ giữ lại để đối chiếu số nút với perft.py --bitboard.
+
+SQUARE_BB = tuple(1 << sq for sq in range(NUM_SQUARES))
+FILE_SQUARE_BB = tuple(1 << ((sq % FILES) * RANKS + sq // FILES) for sq in range(NUM_SQUARES))
+FILE_MASKS = tuple(sum(1 << (y * FILES + x) for y in range(RANKS)) for x in range(FILES))
+
+
+def _mask(squares):
+    bb = 0
+    for sq in squares:
+        bb |= 1 << sq
+    return bb
+
+
+def _line_tables(length):
+    """Bảng tấn công trên một đường (hàng/cột) theo vị trí quân và mẫu chiếm chỗ.
+
+    Trả về (rook, cannon_quiet, cannon_capture), mỗi bảng là [vị trí][mẫu] -> mặt nạ trên đường.
+    """
+    rook = []
+    cannon_quiet = []
+    cannon_capture = []
+    for i in range(length):
+        rook_row = []
+        quiet_row = []
+        capture_row = []
+        for pattern in range(1 << length):
+            rook_bits = quiet_bits = capture_bits = 0
+            for step in (1, -1):
+                j = i + step
+                screened = False
+                while 0 <= j < length:
+                    occupied = pattern >> j & 1
+                    if not screened:
+                        if occupied:
+                            rook_bits |= 1 << j
+                            screened = True
+                        else:
+                            rook_bits |= 1 << j
+                            quiet_bits |= 1 << j
+                    elif occupied:
+                        capture_bits |= 1 << j
+                        break
+                    j += step
+            rook_row.append(rook_bits)
+            quiet_row.append(quiet_bits)
+            capture_row.append(capture_bits)
+        rook.append(tuple(rook_row))
+        cannon_quiet.append(tuple(quiet_row))
+        cannon_capture.append(tuple(capture_row))
+    return tuple(rook), tuple(cannon_quiet), tuple(cannon_capture)
+
+
+RANK_ROOK, RANK_CANNON_QUIET, RANK_CANNON_CAPTURE = _line_tables(FILES)
+FILE_ROOK, FILE_CANNON_QUIET, FILE_CANNON_CAPTURE = _line_tables(RANKS)
+# Mặt nạ 10 bit trên cột -> bitboard theo hàng ở cột x = 0 (dịch trái x để sang cột khác)
+FILE_TO_BB = tuple(sum(1 << (y * FILES) for y in range(RANKS) if mask >> y & 1) for mask in range(1 << RANKS))
+
+HORSE_LEGS = tuple(
+    tuple((1 << leg, _mask(to for to, l in HORSE_MOVES[sq] if l == leg)) for leg in {l for _, l in HORSE_MOVES[sq]})
+    for sq in range(NUM_SQUARES))
+HORSE_CHECK_LEGS = tuple(
+    tuple((1 << leg, _mask(frm for frm, l in HORSE_ATTACKERS[sq] if l == leg)) for leg in {l for _, l in HORSE_ATTACKERS[sq]})
+    for sq in range(NUM_SQUARES))
+ELEPHANT_EYES = tuple(tuple(tuple((1 << eye, 1 << to) for to, eye in ELEPHANT_MOVES[side][sq])
+                            for sq in range(NUM_SQUARES)) for side in (RED, BLACK))
+ADVISOR_BB = tuple(tuple(_mask(ADVISOR_MOVES[side][sq]) for sq in range(NUM_SQUARES)) for side in (RED, BLACK))
+KING_BB = tuple(tuple(_mask(KING_MOVES[side][sq]) for sq in range(NUM_SQUARES)) for side in (RED, BLACK))
+PAWN_BB = tuple(tuple(_mask(PAWN_MOVES[side][sq]) for sq in range(NUM_SQUARES)) for side in (RED, BLACK))
+PAWN_ATTACKERS_BB = tuple(tuple(_mask(PAWN_ATTACKERS[side][sq]) for sq in range(NUM_SQUARES)) for side in (RED, BLACK))
+
+
+def iter_bits(bb):
+    """Duyệt chỉ số các bit bật trong bitboard."""
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+
+class Bitboards:
+    """Thế cờ dạng bitboard: chiếm chỗ theo bên, theo loại quân và theo cột."""
+
+    def __init__(self):
+        self.board = array('b', bytes(NUM_SQUARES))
+        self.occupied = [0, 0]
+        self.occupied_files = 0
+        self.kinds = ([0] * 8, [0] * 8)
+        self.red_turn = True
+
+    def put(self, sq, code):
+        side = RED if code > 0 else BLACK
+        self.board[sq] = code
+        self.occupied[side] |= SQUARE_BB[sq]
+        self.occupied_files |= FILE_SQUARE_BB[sq]
+        self.kinds[side][abs(code)] |= SQUARE_BB[sq]
+
+    @classmethod
+    def from_position(cls, position):
+        bitboards = cls()
+        for side in (RED, BLACK):
+            for sq in position.piece_lists[side]:
+                bitboards.put(sq, position.board[sq])
+        bitboards.red_turn = position.red_turn
+        return bitboards
+
+    # ----- Tấn công của quân trượt (tra bảng theo mẫu chiếm chỗ của hàng/cột) -----
+    def rook_attacks(self, sq):
+        x, y = sq % FILES, sq // FILES
+        shift = y * FILES
+        rank_pattern = ((self.occupied[RED] | self.occupied[BLACK]) >> shift) & 0x1FF
+        file_pattern = (self.occupied_files >> (x * RANKS)) & 0x3FF
+        return (RANK_ROOK[x][rank_pattern] << shift) | (FILE_TO_BB[FILE_ROOK[y][file_pattern]] << x)
+
+    def cannon_attacks(self, sq):
+        """Trả về (nước đi thường, ô có thể ăn) của pháo tại sq."""
+        x, y = sq % FILES, sq // FILES
+        shift = y * FILES
+        rank_pattern = ((self.occupied[RED] | self.occupied[BLACK]) >> shift) & 0x1FF
+        file_pattern = (self.occupied_files >> (x * RANKS)) & 0x3FF
+        quiet = (RANK_CANNON_QUIET[x][rank_pattern] << shift) | (FILE_TO_BB[FILE_CANNON_QUIET[y][file_pattern]] << x)
+        capture = (RANK_CANNON_CAPTURE[x][rank_pattern] << shift) | (FILE_TO_BB[FILE_CANNON_CAPTURE[y][file_pattern]] << x)
+        return quiet, capture
+
+    def piece_targets(self, sq, kind, side):
+        """Bitboard các ô đến giả hợp lệ của một quân."""
+        own = self.occupied[side]
+        if kind == ROOK:
+            return self.rook_attacks(sq) & ~own
+        if kind == CANNON:
+            quiet, capture = self.cannon_attacks(sq)
+            return quiet | (capture & self.occupied[side ^ 1])
+        if kind == HORSE:
+            occupied = self.occupied[RED] | self.occupied[BLACK]
+            targets = 0
+            for leg_bit, leg_targets in HORSE_LEGS[sq]:
+                if not occupied & leg_bit:
+                    targets |= leg_targets
+            return targets & ~own
+        if kind == ELEPHANT:
+            occupied = self.occupied[RED] | self.occupied[BLACK]
+            targets = 0
+            for eye_bit, target_bit in ELEPHANT_EYES[side][sq]:
+                if not occupied & eye_bit:
+                    targets |= target_bit
+            return targets & ~own
+        if kind == ADVISOR:
+            return ADVISOR_BB[side][sq] & ~own
+        if kind == KING:
+            return KING_BB[side][sq] & ~own
+        return PAWN_BB[side][sq] & ~own
+
+    def in_check(self, side):
+        """Tướng của side có bị tấn công không (kể cả luật hai tướng đối mặt)."""
+        king_bb = self.kinds[side][KING]
+        if not king_bb:
+            return True
+        sq = king_bb.bit_length() - 1
+        enemy = self.kinds[side ^ 1]
+        rook_attacks = self.rook_attacks(sq)
+        if rook_attacks & (enemy[ROOK] | (enemy[KING] & FILE_MASKS[sq % FILES])):
+            return True
+        if enemy[CANNON] and self.cannon_attacks(sq)[1] & enemy[CANNON]:
+            return True
+        if enemy[HORSE]:
+            occupied = self.occupied[RED] | self.occupied[BLACK]
+            for leg_bit, attackers in HORSE_CHECK_LEGS[sq]:
+                if attackers & enemy[HORSE] and not occupied & leg_bit:
+                    return True
+        return bool(PAWN_ATTACKERS_BB[side ^ 1][sq] & enemy[PAWN])
+
+    def make_move(self, move):
+        from_sq = move >> 8
+        to_sq = move & 0xFF
+        board = self.board
+        piece = board[from_sq]
+        captured = board[to_sq]
+        side = RED if piece > 0 else BLACK
+        from_bb = SQUARE_BB[from_sq]
+        to_bb = SQUARE_BB[to_sq]
+        if captured:
+            self.occupied[side ^ 1] ^= to_bb
+            self.kinds[side ^ 1][abs(captured)] ^= to_bb
+        else:
+            self.occupied_files ^= FILE_SQUARE_BB[to_sq]
+        self.occupied_files ^= FILE_SQUARE_BB[from_sq]
+        self.occupied[side] ^= from_bb | to_bb
+        self.kinds[side][abs(piece)] ^= from_bb | to_bb
+        board[to_sq] = piece
+        board[from_sq] = EMPTY
+        self.red_turn = not self.red_turn
+        return captured
+
+    def unmake_move(self, move, captured):
+        from_sq = move >> 8
+        to_sq = move & 0xFF
+        board = self.board
+        piece = board[to_sq]
+        side = RED if piece > 0 else BLACK
+        from_bb = SQUARE_BB[from_sq]
+        to_bb = SQUARE_BB[to_sq]
+        if captured:
+            self.occupied[side ^ 1] ^= to_bb
+            self.kinds[side ^ 1][abs(captured)] ^= to_bb
+        else:
+            self.occupied_files ^= FILE_SQUARE_BB[to_sq]
+        self.occupied_files ^= FILE_SQUARE_BB[from_sq]
+        self.occupied[side] ^= from_bb | to_bb
+        self.kinds[side][abs(piece)] ^= from_bb | to_bb
+        board[from_sq] = piece
+        board[to_sq] = captured
+        self.red_turn = not self.red_turn
+
+    def generate_moves(self, legal=True):
+        """Sinh toàn bộ nước đi của bên đang đi; legal=True thì loại nước để tướng bị chiếu."""
+        side = RED if self.red_turn else BLACK
+        kinds = self.kinds[side]
+        moves = []
+        for kind in (ROOK, CANNON, HORSE, PAWN, ELEPHANT, ADVISOR, KING):
+            for from_sq in iter_bits(kinds[kind]):
+                base = from_sq << 8
+                for to_sq in iter_bits(self.piece_targets(from_sq, kind, side)):
+                    moves.append(base | to_sq)
+        if not legal:
+            return moves
+        legal_moves = []
+        for move in moves:
+            captured = self.make_move(move)
+            if not self.in_check(side):
+                legal_moves.append(move)
+            self.unmake_move(move, captured)
+        return legal_moves
+
+    def generate_legal_moves(self):
+        return self.generate_moves(legal=True)
@@ -1,3 +1,5 @@
+import os
+
 import pygame
 
 # Khai báo kích thước màn hình
@@ -20,4 +22,8 @@ BOARD_HEIGHT = 9 * CELL_SIZE
 
 # Tính toán vị trí bắt đầu vẽ bàn cờ
 BOARD_X = (SCREEN_WIDTH - BOARD_WIDTH) // 2
-BOARD_Y = (SCREEN_HEIGHT - BOARD_HEIGHT) // 2
\ No newline at end of file
+BOARD_Y = (SCREEN_HEIGHT - BOARD_HEIGHT) // 2
+
+# File ghi lại các ván đã chơi (định dạng trong game_record.py), nằm cạnh mã nguồn như assets/book.bin
+GAME_RECORD_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "games.xqr")
+SAVE_UNFINISHED_GAMES = False  # Ghi cả ván bỏ dở (chưa có kết quả)
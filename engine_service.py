@@ -0,0 +1,305 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from ai import ChessAI, MAX_DEPTH, mate_in, principal_variation
+from position import Position, iccs_to_move, move_to_iccs
+
+# Dịch vụ engine nhiều ván dùng asyncio, giao tiếp bằng JSON mỗi dòng một yêu cầu (qua stdin/stdout hoặc
+# unix socket). Ví dụ:
+#   {"id": 1, "session": "g1", "fen": "...", "moves": ["h2e2"], "depth": 6, "time": 0.5, "deadline": 2.0}
+#   {"id": 2, "op": "metrics"}          {"id": 3, "op": "close", "session": "g1"}
+# Mỗi ván (session) luôn được gửi về cùng một tiến trình con nên ChessAI và bảng chuyển vị của ván được giữ "ấm"
+# giữa các nước. Hàng đợi mỗi tiến trình có giới hạn; đầy thì từ chối ngay ("busy") để bên gọi tự giảm tải.
+
+DEFAULT_QUEUE_SIZE = 16  # Số yêu cầu chờ tối đa cho mỗi tiến trình
+DEFAULT_TT_MB = 4  # Bảng chuyển vị cho mỗi ván
+MAX_SESSIONS_PER_WORKER = 32  # Quá số này thì bỏ ván lâu không dùng nhất
+DEADLINE_MARGIN = 0.05  # Giây dành cho việc gửi kết quả về trước hạn chót
+LATENCY_SAMPLES = 10000
+
+# ===== Chạy trong tiến trình con =====
+_sessions = OrderedDict()
+_tt_size_mb = DEFAULT_TT_MB
+
+
+def _init_service_worker(tt_size_mb):
+    global _tt_size_mb
+    _tt_size_mb = tt_size_mb
+
+
+def _session_ai(session):
+    ai = _sessions.pop(session, None)
+    if ai is None:
+        ai = ChessAI(True, _tt_size_mb)
+    _sessions[session] = ai
+    while len(_sessions) > MAX_SESSIONS_PER_WORKER:
+        _sessions.popitem(last=False)
+    return ai
+
+
+def _session_search(session, fen, moves, depth, time_limit, node_limit):
+    """Tìm nước đi cho một ván bằng ChessAI riêng của ván đó; trả về dict kết quả."""
+    try:
+        position = Position.from_fen(fen) if fen else Position.initial()
+        for text in moves:
+            move = iccs_to_move(text)
+            if move not in position.generate_legal_moves():
+                raise ValueError("nước đi không hợp lệ %s" % text)
+            position.make_move(move)
+    except (ValueError, KeyError, IndexError) as error:
+        return {"error": "thế cờ không hợp lệ: %s" % error}
+    ai = _session_ai(session)
+    score, best_move = ai.iterative_deepening(position, depth, time_limit, node_limit)
+    result = {"bestmove": move_to_iccs(best_move) if best_move is not None else None, "score": score,
+              "depth": ai.completed_depth, "nodes": ai.nodes,
+              "pv": [move_to_iccs(move) for move in principal_variation(ai, position, best_move, ai.completed_depth)]}
+    if mate_in(score) is not None:
+        result["mate"] = mate_in(score)
+    return result
+
+
+def _close_session(session):
+    return {"closed": _sessions.pop(session, None) is not None}
+
+
+# ===== Tiến trình chính =====
+def _positive(request, name, kind):
+    """Giới hạn dạng số dương trong yêu cầu (None nếu không có); ValueError nếu sai kiểu."""
+    value = request.get(name)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not value > 0:
+        raise ValueError("%s phải là số dương" % name)
+    if kind is int:
+        if isinstance(value, float) and not value.is_integer():
+            raise ValueError("%s phải là số nguyên" % name)
+        return int(value)
+    return float(value)
+
+
+def _parse_move_request(request):
+    """Kiểm tra yêu cầu tìm nước đi, trả về (fen, moves, depth, time_limit, node_limit, deadline giây)."""
+    fen = request.get("fen")
+    if fen is not None and not isinstance(fen, str):
+        raise ValueError("fen phải là chuỗi")
+    moves = request.get("moves", [])
+    if not isinstance(moves, list) or not all(isinstance(move, str) for move in moves):
+        raise ValueError("moves phải là danh sách nước ICCS")
+    depth = min(_positive(request, "depth", int) or MAX_DEPTH, MAX_DEPTH)
+    time_limit = _positive(request, "time", float)
+    node_limit = _positive(request, "nodes", int)
+    if time_limit is None and "depth" not in request and node_limit is None:
+        time_limit = 1.0  # Không có giới hạn nào thì nghĩ một giây
+    return fen, moves, depth, time_limit, node_limit, _positive(request, "deadline", float)
+
+
+class EngineService:
+    """Nhận yêu cầu từ nhiều ván và xếp vào các tiến trình tìm kiếm, mỗi tiến trình một hàng đợi có giới hạn."""
+
+    def __init__(self, workers=None, queue_size=DEFAULT_QUEUE_SIZE, tt_size_mb=DEFAULT_TT_MB):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.tt_size_mb = tt_size_mb
+        self.executors = []
+        self.queues = []
+        self.tasks = []
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)  # Giây từ lúc nhận đến lúc trả lời
+        self.counts = {"completed": 0, "rejected": 0, "expired": 0, "errors": 0}
+
+    async def start(self):
+        # Mỗi executor chỉ có một tiến trình để giữ ván nào về tiến trình nấy
+        for _ in range(self.workers):
+            executor = ProcessPoolExecutor(1, initializer=_init_service_worker, initargs=(self.tt_size_mb,))
+            queue = asyncio.Queue(self.queue_size)
+            self.executors.append(executor)
+            self.queues.append(queue)
+            self.tasks.append(asyncio.create_task(self._run_queue(executor, queue)))
+
+    async def close(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        # shutdown() chờ tiến trình con thoát nên chạy trong luồng riêng để không chặn vòng lặp sự kiện
+        await asyncio.gather(*(asyncio.to_thread(executor.shutdown, cancel_futures=True)
+                               for executor in self.executors))
+        self.executors, self.queues, self.tasks = [], [], []
+
+    def shard(self, session):
+        # crc32 thay cho hash() vì hash của chuỗi đổi theo mỗi lần chạy
+        return zlib.crc32(str(session).encode("utf-8")) % self.workers
+
+    async def _run_queue(self, executor, queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            _, deadline, function, args, future = await queue.get()
+            try:
+                if future.cancelled():
+                    continue
+                if function is _session_search and deadline is not None:
+                    remaining = deadline - time.perf_counter() - DEADLINE_MARGIN
+                    if remaining <= 0:
+                        self.counts["expired"] += 1
+                        future.set_result({"error": "deadline exceeded"})
+                        continue
+                    time_limit = args[4]
+                    args = args[:4] + (remaining if time_limit is None else min(time_limit, remaining),) + args[5:]
+                try:
+                    result = await loop.run_in_executor(executor, function, *args)
+                except Exception as error:  # Tiến trình con chết hoặc lỗi bất ngờ: trả lỗi cho yêu cầu này
+                    result = {"error": "%s: %s" % (type(error).__name__, error)}
+                if not future.cancelled():
+                    future.set_result(result)
+            finally:
+                queue.task_done()
+
+    def metrics(self):
+        samples = sorted(self.latencies)
+
+        def percentile(p):
+            if not samples:
+                return 0.0
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 1)
+
+        return dict(self.counts, queue_depth=sum(queue.qsize() for queue in self.queues),
+                    queue_depths=[queue.qsize() for queue in self.queues],
+                    latency_p50_ms=percentile(0.50), latency_p99_ms=percentile(0.99))
+
+    async def handle(self, request):
+        """Xử lý một yêu cầu (dict), trả về dict trả lời có cùng "id"."""
+        received = time.perf_counter()
+        op = request.get("op", "move")
+        if op == "metrics":
+            reply = self.metrics()
+        elif op in ("move", "close"):
+            reply = await self._submit(request, received, op)
+        else:
+            reply = {"error": "unknown op %r" % op}
+        if "id" in request:
+            reply["id"] = request["id"]
+        return reply
+
+    async def _submit(self, request, received, op):
+        session = request.get("session", "")
+        try:
+            if not isinstance(session, (str, int)) or isinstance(session, bool):
+                raise ValueError("session phải là chuỗi hoặc số")
+            if op == "close":
+                function, args, deadline = _close_session, (session,), None
+            else:
+                fen, moves, depth, time_limit, node_limit, deadline = _parse_move_request(request)
+                if deadline is not None:
+                    deadline += received
+                function = _session_search
+                args = (session, fen, moves, depth, time_limit, node_limit)
+        except ValueError as error:
+            if op == "move":
+                self.counts["errors"] += 1
+            return {"error": "bad request: %s" % error}
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queues[self.shard(session)].put_nowait((received, deadline, function, args, future))
+        except asyncio.QueueFull:
+            self.counts["rejected"] += 1
+            return {"error": "busy"}
+        reply = await future
+        if op == "move":
+            self.counts["errors" if "error" in reply else "completed"] += 1
+            self.latencies.append(time.perf_counter() - received)
+        return reply
+
+    async def serve_stream(self, reader, write):
+        """Đọc yêu cầu JSON từng dòng và trả lời ngay khi xong (có thể khác thứ tự, ghép bằng "id")."""
+        pending = set()
+
+        async def answer(request):
+            try:
+                reply = await self.handle(request)
+            except Exception as error:  # Lỗi bất ngờ vẫn phải trả lời để bên gọi không chờ mãi
+                reply = {"error": "%s: %s" % (type(error).__name__, error)}
+                if "id" in request:
+                    reply["id"] = request["id"]
+            write(json.dumps(reply, ensure_ascii=False) + "\n")
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("yêu cầu phải là object JSON")
+            except ValueError as error:
+                write(json.dumps({"error": "bad request: %s" % error}, ensure_ascii=False) + "\n")
+                continue
+            task = asyncio.create_task(answer(request))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.gather(*pending)
+
+
+async def serve_stdio(service):
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+    def write(text):
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    await service.serve_stream(reader, write)
+
+
+async def serve_socket(service, path):
+    async def client(reader, writer):
+        try:
+            await service.serve_stream(reader, lambda text: writer.write(text.encode("utf-8")))
+            await writer.drain()
+        finally:
+            writer.close()
+
+    if os.path.exists(path):
+        os.remove(path)
+    server = await asyncio.start_unix_server(client, path)
+    async with server:
+        await server.serve_forever()
+
+
+async def run(args):
+    service = EngineService(args.workers, args.queue_size, args.tt_size)
+    await service.start()
+    try:
+        if args.socket:
+            await serve_socket(service, args.socket)
+        else:
+            await serve_stdio(service)
+    finally:
+        await service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dịch vụ engine nhiều ván, JSON mỗi dòng một yêu cầu")
+    parser.add_argument("--socket", help="đường dẫn unix socket (mặc định: stdin/stdout)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="số tiến trình tìm kiếm (mặc định: số nhân)")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE, help="số yêu cầu chờ tối đa mỗi tiến trình")
+    parser.add_argument("--tt-size", type=int, default=DEFAULT_TT_MB, help="MB bảng chuyển vị cho mỗi ván")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
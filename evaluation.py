@@ -0,0 +1,121 @@
+from pieces import PIECE_VALUES, FILES, RANKS, NUM_SQUARES, KING, ADVISOR, ELEPHANT, HORSE, ROOK, CANNON, PAWN
+
+# Hàm lượng giá: vật chất + bảng điểm vị trí (PST), chia hai giai đoạn trung cuộc/tàn cuộc
+# rồi trộn theo số quân tấn công còn lại. Position cập nhật tổng mg/eg/phase dần theo từng nước
+# nên lượng giá ở nút lá là O(1).
+
+MATERIAL_MG = [0, 0] + PIECE_VALUES[ADVISOR:]  # Tướng luôn có mặt nên không tính vật chất
+MATERIAL_EG = [0, 0, 100, 100, 290, 650, 260, 60]
+
+# Trọng số giai đoạn: Xe 2, Mã 1, Pháo 1 → đủ quân là 16
+PHASE_WEIGHTS = [0, 0, 0, 0, 1, 2, 1, 0]
+MAX_PHASE = 16
+
+# Bảng vị trí theo góc nhìn Đỏ: hàng đầu tiên là hàng y = 0 (hàng cuối phía Đen)
+_ROOK = (
+    (6, 8, 7, 13, 14, 13, 7, 8, 6),
+    (6, 12, 9, 16, 33, 16, 9, 12, 6),
+    (6, 8, 7, 14, 16, 14, 7, 8, 6),
+    (6, 13, 13, 16, 16, 16, 13, 13, 6),
+    (8, 11, 11, 14, 15, 14, 11, 11, 8),
+    (8, 12, 12, 14, 15, 14, 12, 12, 8),
+    (4, 9, 4, 12, 14, 12, 4, 9, 4),
+    (-2, 8, 4, 12, 12, 12, 4, 8, -2),
+    (5, 8, 6, 12, 0, 12, 6, 8, 5),
+    (-6, 6, 4, 12, 0, 12, 4, 6, -6),
+)
+_HORSE = (
+    (4, 8, 16, 12, 4, 12, 16, 8, 4),
+    (4, 10, 28, 16, 8, 16, 28, 10, 4),
+    (12, 14, 16, 20, 18, 20, 16, 14, 12),
+    (8, 24, 18, 24, 20, 24, 18, 24, 8),
+    (6, 16, 14, 18, 16, 18, 14, 16, 6),
+    (4, 12, 16, 14, 12, 14, 16, 12, 4),
+    (2, 6, 8, 6, 10, 6, 8, 6, 2),
+    (4, 2, 8, 8, 4, 8, 8, 2, 4),
+    (0, 2, 4, 4, -2, 4, 4, 2, 0),
+    (0, -4, 0, 0, 0, 0, 0, -4, 0),
+)
+_CANNON = (
+    (6, 4, 0, -10, -12, -10, 0, 4, 6),
+    (2, 2, 0, -4, -14, -4, 0, 2, 2),
+    (2, 2, 0, -10, -8, -10, 0, 2, 2),
+    (0, 0, -2, 4, 10, 4, -2, 0, 0),
+    (0, 0, 0, 2, 8, 2, 0, 0, 0),
+    (-2, 0, 4, 2, 6, 2, 4, 0, -2),
+    (0, 0, 0, 2, 4, 2, 0, 0, 0),
+    (4, 0, 8, 6, 10, 6, 8, 0, 4),
+    (0, 2, 4, 6, 6, 6, 4, 2, 0),
+    (0, 0, 2, 6, 6, 6, 2, 0, 0),
+)
+_PAWN = (
+    (0, 3, 6, 9, 12, 9, 6, 3, 0),
+    (18, 36, 56, 80, 120, 80, 56, 36, 18),
+    (14, 26, 42, 60, 80, 60, 42, 26, 14),
+    (10, 20, 30, 34, 40, 34, 30, 20, 10),
+    (6, 12, 18, 18, 20, 18, 18, 12, 6),
+    (2, 0, 8, 0, 8, 0, 8, 0, 2),
+    (0, 0, -2, 0, 4, 0, -2, 0, 0),
+    (0, 0, 0, 0, 0, 0, 0, 0, 0),
+    (0, 0, 0, 0, 0, 0, 0, 0, 0),
+    (0, 0, 0, 0, 0, 0, 0, 0, 0),
+)
+_EMPTY_ROWS = ((0,) * FILES,) * 7
+_ADVISOR = _EMPTY_ROWS + (
+    (0, 0, 0, 0, 0, 0, 0, 0, 0),
+    (0, 0, 0, 0, 3, 0, 0, 0, 0),
+    (0, 0, 0, 0, 0, 0, 0, 0, 0),
+)
+_ELEPHANT = ((0,) * FILES,) * 5 + (
+    (0, 0, -2, 0, 0, 0, -2, 0, 0),
+    (0, 0, 0, 0, 0, 0, 0, 0, 0),
+    (-2, 0, 0, 0, 3, 0, 0, 0, -2),
+    (0, 0, 0, 0, 0, 0, 0, 0, 0),
+    (0, 0, 0, 0, 0, 0, 0, 0, 0),
+)
+_KING_MG = _EMPTY_ROWS + (
+    (0, 0, 0, -10, -12, -10, 0, 0, 0),
+    (0, 0, 0, -6, -6, -6, 0, 0, 0),
+    (0, 0, 0, 2, 6, 2, 0, 0, 0),
+)
+# Tàn cuộc: tướng ra giữa cung để hỗ trợ tấn công/phòng thủ
+_KING_EG = _EMPTY_ROWS + (
+    (0, 0, 0, -2, 0, -2, 0, 0, 0),
+    (0, 0, 0, 0, 6, 0, 0, 0, 0),
+    (0, 0, 0, -2, 0, -2, 0, 0, 0),
+)
+
+PST_MG = {KING: _KING_MG, ADVISOR: _ADVISOR, ELEPHANT: _ELEPHANT, HORSE: _HORSE,
+          ROOK: _ROOK, CANNON: _CANNON, PAWN: _PAWN}
+PST_EG = {KING: _KING_EG, ADVISOR: _ADVISOR, ELEPHANT: _ELEPHANT, HORSE: _HORSE,
+          ROOK: _ROOK, CANNON: tuple(tuple(v // 2 for v in row) for row in _CANNON),
+          PAWN: tuple(tuple(v * 3 // 2 for v in row) for row in _PAWN)}
+
+
+def _build_table(material, pst):
+    """TABLE[code + 7][sq]: vật chất + vị trí, có dấu (Đen âm, bảng lật theo chiều dọc)."""
+    table = [(0,) * NUM_SQUARES for _ in range(15)]
+    for kind in range(KING, PAWN + 1):
+        red_row = []
+        black_row = []
+        for sq in range(NUM_SQUARES):
+            x, y = sq % FILES, sq // FILES
+            red_row.append(material[kind] + pst[kind][y][x])
+            black_row.append(-(material[kind] + pst[kind][RANKS - 1 - y][x]))
+        table[kind + 7] = tuple(red_row)
+        table[-kind + 7] = tuple(black_row)
+    return tuple(table)
+
+
+MG_TABLE = _build_table(MATERIAL_MG, PST_MG)
+EG_TABLE = _build_table(MATERIAL_EG, PST_EG)
+
+
+def evaluate(position):
+    """Điểm theo góc nhìn bên Đỏ, trộn trung cuộc/tàn cuộc theo giai đoạn."""
+    phase = position.phase
+    if phase > MAX_PHASE:
+        phase = MAX_PHASE
+    score = position.mg * phase + position.eg * (MAX_PHASE - phase)
+    # Chia làm tròn về 0 (không dùng // vốn làm tròn xuống) để hai bên đổi màu cho điểm đối nhau đúng tuyệt đối
+    return score // MAX_PHASE if score >= 0 else -(-score // MAX_PHASE)
@@ -0,0 +1,124 @@
+import os
+import struct
+import sys
+
+from position import Position, PACKED_BYTES, move_to_iccs
+
+# File ván cờ chỉ ghi nối thêm: đầu file 8 byte, sau đó là các ván liên tiếp. Mỗi ván gồm đầu ván
+# (số nước 2 byte, kết quả 1 byte, cờ 1 byte), thế cờ xuất phát nén 46 byte nếu cờ có bit START,
+# rồi các nước đi 2 byte (from << 8 | to).
+MAGIC = b"XQGR"
+VERSION = 1
+FILE_HEADER = struct.Struct("<4sBxxx")
+GAME_HEADER = struct.Struct("<HBB")
+MOVE = struct.Struct("<H")
+FLAG_START = 1  # Ván không bắt đầu từ thế cờ ban đầu
+
+# Kết quả ván, theo góc nhìn bên Đỏ
+UNKNOWN, RED_WIN, DRAW, BLACK_WIN = 0, 1, 2, 3
+RESULT_TEXT = {UNKNOWN: "*", RED_WIN: "1-0", DRAW: "1/2-1/2", BLACK_WIN: "0-1"}
+
+READ_CHUNK = 1 << 16
+
+
+def is_record_file(path):
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def append_game(path, moves, result=UNKNOWN, start=None):
+    """Ghi nối một ván vào cuối file (tạo file mới nếu chưa có). start: Position xuất phát, None = thế ban đầu."""
+    if len(moves) > 0xFFFF:
+        raise ValueError("Ván quá dài: %d nước" % len(moves))
+    data = bytearray()
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        data += FILE_HEADER.pack(MAGIC, VERSION)
+    data += GAME_HEADER.pack(len(moves), result, FLAG_START if start is not None else 0)
+    if start is not None:
+        data += start.pack()
+    data += struct.pack("<%dH" % len(moves), *moves)
+    # Một lần ghi cho cả ván để file không bị cắt dở giữa chừng khi có nhiều tiến trình cùng ghi
+    with open(path, "ab") as f:
+        f.write(data)
+
+
+def read_games(path):
+    """Đọc dần từng ván: sinh (start, moves, result), start là chuỗi nén 46 byte hoặc None.
+
+    Chỉ giữ trong bộ nhớ một khối đọc và ván hiện tại nên đọc được file rất lớn.
+    """
+    with open(path, "rb") as f:
+        header = f.read(FILE_HEADER.size)
+        if len(header) < FILE_HEADER.size:
+            return
+        magic, version = FILE_HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Không phải file ván cờ hợp lệ: %s" % path)
+        buffer = b""
+        offset = 0
+
+        def take(size):
+            nonlocal buffer, offset
+            while len(buffer) - offset < size:
+                chunk = f.read(max(READ_CHUNK, size))
+                if not chunk:
+                    raise ValueError("File ván cờ bị cắt dở: %s" % path)
+                buffer = buffer[offset:] + chunk
+                offset = 0
+            data = buffer[offset:offset + size]
+            offset += size
+            return data
+
+        while True:
+            if len(buffer) - offset == 0:
+                buffer, offset = f.read(READ_CHUNK), 0
+                if not buffer:
+                    return
+            count, result, flags = GAME_HEADER.unpack(take(GAME_HEADER.size))
+            start = take(PACKED_BYTES) if flags & FLAG_START else None
+            moves = struct.unpack("<%dH" % count, take(count * MOVE.size))
+            yield start, moves, result
+
+
+def replay_game(start, moves, validate=True, number=1):
+    """Chơi lại một ván: sinh (thế cờ trước nước đi, nước đi). Thế cờ được dùng lại cho cả ván."""
+    position = Position.unpack(start) if start is not None else Position.initial()
+    for ply, move in enumerate(moves):
+        if validate and move not in position.generate_legal_moves():
+            raise ValueError("Ván %d, nửa nước %d: nước đi không hợp lệ %s" % (number, ply + 1, move_to_iccs(move)))
+        yield position, move
+        position.make_move(move)
+
+
+def replay(path, validate=True):
+    """Chơi lại từng ván qua bộ sinh nước đi: sinh (số thứ tự ván, thế cờ trước nước đi, nước đi, kết quả).
+
+    Thế cờ đi tiếp sau mỗi lần sinh, cần giữ lại thì gọi pack() hoặc copy().
+    validate: báo ValueError nếu gặp nước đi không hợp lệ.
+    """
+    for number, (start, moves, result) in enumerate(read_games(path), start=1):
+        for position, move in replay_game(start, moves, validate, number):
+            yield number, position, move, result
+
+
+def main(argv=None):
+    """In tóm tắt file ván cờ: số ván, số nước, thống kê kết quả (kiểm tra lại mọi nước đi)."""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("usage: python game_record.py FILE...")
+        return 2
+    for path in argv:
+        games = moves = 0
+        results = dict.fromkeys(RESULT_TEXT.values(), 0)
+        for number, (start, game_moves, result) in enumerate(read_games(path), start=1):
+            for _ in replay_game(start, game_moves, number=number):
+                moves += 1
+            games += 1
+            results[RESULT_TEXT[result]] += 1
+        print("%s: %d games, %d moves, %s" % (path, games, moves,
+                                              ", ".join("%s %d" % item for item in results.items())))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
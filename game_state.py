@@ -1,4 +1,6 @@
 from move_validator import MoveValidator
+from position import square, encode_move
+from game_record import UNKNOWN, RED_WIN, BLACK_WIN, DRAW, append_game
 
 
 class GameState:
@@ -6,6 +8,29 @@ class GameState:
         self.red_pieces = red_pieces
         self.black_pieces = black_pieces
         self.red_turn = True
+        # Nhật ký nước đi: (ô đi, ô đến, quân đi, quân bị ăn hoặc None)
+        self.move_log = []
+        self.result = UNKNOWN
+
+    def record_move(self, start, end, piece, captured=None):
+        """Ghi lại nước vừa đi (gọi sau khi đã cập nhật dict quân) và đổi lượt."""
+        self.move_log.append((start, end, piece, captured))
+        self.red_turn = not self.red_turn
+
+    def set_winner(self, red_won):
+        self.result = RED_WIN if red_won else BLACK_WIN
+
+    def set_draw(self):
+        self.result = DRAW
+
+    def encoded_moves(self):
+        """Các nước đi dạng số nguyên (from << 8 | to) như Position/game_record dùng."""
+        return [encode_move(square(*start), square(*end)) for start, end, _, _ in self.move_log]
+
+    def save(self, path, unfinished=False):
+        """Ghi nối ván vào file ván cờ. Bỏ qua ván chưa đi nước nào, và ván chưa có kết quả trừ khi unfinished."""
+        if self.move_log and (unfinished or self.result != UNKNOWN):
+            append_game(path, self.encoded_moves(), self.result)
 
     def is_checkmate(self):
         """Kiểm tra nếu tướng bị chiếu hết cờ."""
@@ -13,7 +38,7 @@ class GameState:
         other_pieces = self.black_pieces if self.red_turn else self.red_pieces
 
         for pos, piece in pieces.items():
-            valid_moves = MoveValidator.generate_valid_moves(piece, pos, pieces, other_pieces)
+            valid_moves = MoveValidator.generate_legal_moves(piece, pos, pieces, other_pieces, self.red_turn)
             if valid_moves:
                 return False  # Vẫn còn nước đi hợp lệ
         return True  # Không còn nước đi, bị chiếu hết
@@ -1,11 +1,12 @@
 import pygame
 import config
-from ai import ChessAI
+from ai_worker import AIWorker
 from pieces import PieceData
 from move_validator import MoveValidator
 from board import GameBoard
 from timer_manager import TimerManager
 from captured_pieces import CapturedPieces
+from game_state import GameState
 
 # =========================
 # UI helpers
@@ -217,11 +218,15 @@ def run_match(screen, sound: SoundManager, human_is_red: bool | None, ai_depth:
     timer = TimerManager(600)  # 10 phút mỗi bên
     captured = CapturedPieces(screen)
     black_pieces, red_pieces = PieceData.get_initial_pieces()
+    state = GameState(red_pieces, black_pieces)  # Nhật ký nước đi, ghi ra file khi hết ván
+    checked_moves = -1  # Số nước đã kiểm tra chiếu hết
 
     ai = None
+    ai_future = None      # Nước đi AI đang tính ở tiến trình nền
+    ai_started = 0
     if ai_depth is not None:
-        # AI là phía còn lại của human
-        ai = ChessAI(is_red=not human_is_red)
+        # AI là phía còn lại của human, tìm kiếm chạy ở tiến trình riêng để giao diện không bị treo
+        ai = AIWorker(is_red=not human_is_red)
 
     red_turn = True       # Đỏ đi trước
     selected = None
@@ -239,6 +244,10 @@ def run_match(screen, sound: SoundManager, human_is_red: bool | None, ai_depth:
         # ===== EVENT =====
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                if ai is not None:
+                    ai.close()
+                if state is not None:
+                    state.save(config.GAME_RECORD_FILE, config.SAVE_UNFINISHED_GAMES)
                 return "QUIT", None
 
             elif event.type == pygame.VIDEORESIZE:
@@ -272,11 +281,12 @@ def run_match(screen, sound: SoundManager, human_is_red: bool | None, ai_depth:
                 # Kiểm tra chọn quân hoặc đi quân
                 if (gx, gy) in pieces:
                     selected = (gx, gy)
-                    valid_moves = MoveValidator.generate_valid_moves(
-                        pieces[selected], selected, pieces, other
+                    valid_moves = MoveValidator.generate_legal_moves(
+                        pieces[selected], selected, pieces, other, red_turn
                     )
                 elif selected and (gx, gy) in valid_moves:
                     # Ăn quân
+                    captured_piece = None
                     if (gx, gy) in other:
                         captured_piece = other.pop((gx, gy))
                         captured.add_captured_piece(captured_piece, red_turn)
@@ -292,11 +302,14 @@ def run_match(screen, sound: SoundManager, human_is_red: bool | None, ai_depth:
                                 loser_text  = "Bên Đỏ thua!"
                                 loser_is_human = (ai is None) or (human_is_red)
                             pieces[(gx, gy)] = pieces.pop(selected)  # để hiển thị cuối
+                            state.record_move(selected, (gx, gy), pieces[(gx, gy)], captured_piece)
+                            state.set_winner(captured_piece == "將")
                             playing = False
                             break
 
                     # Di chuyển
                     pieces[(gx, gy)] = pieces.pop(selected)
+                    state.record_move(selected, (gx, gy), pieces[(gx, gy)], captured_piece)
                     selected = None
                     valid_moves = []
                     red_turn = not red_turn
@@ -314,24 +327,42 @@ def run_match(screen, sound: SoundManager, human_is_red: bool | None, ai_depth:
             winner_text = "Bên Đen thắng do bên Đỏ hết thời gian!"
             loser_text  = "Bên Đỏ thua!"
             loser_is_human = (ai is None) or (human_is_red is True)
+            state.set_winner(False)
             playing = False
         elif playing and bt <= 0:
             winner_text = "Bên Đỏ thắng do bên Đen hết thời gian!"
             loser_text  = "Bên Đen thua!"
             loser_is_human = (ai is None) or (human_is_red is False)
+            state.set_winner(True)
             playing = False
 
+        # Bên đến lượt không còn nước đi hợp lệ (bị chiếu hết hoặc bí) thì thua; chỉ kiểm tra sau mỗi nước
+        if playing and len(state.move_log) != checked_moves:
+            checked_moves = len(state.move_log)
+            if state.is_checkmate():
+                if state.red_turn:
+                    winner_text = "Bên Đen thắng! Bên Đỏ hết nước đi."
+                    loser_text  = "Bên Đỏ thua!"
+                    loser_is_human = (ai is None) or (human_is_red is True)
+                else:
+                    winner_text = "Bên Đỏ thắng! Bên Đen hết nước đi."
+                    loser_text  = "Bên Đen thua!"
+                    loser_is_human = (ai is None) or (human_is_red is False)
+                state.set_winner(not state.red_turn)
+                playing = False
+
         # Lượt AI
         if playing and ai is not None:
             is_ai_turn = (ai.is_red and red_turn) or ((not ai.is_red) and (not red_turn))
-            if is_ai_turn:
-                pygame.time.delay(400)
-                depth = 3
-                try:
-                    # nếu bạn có sửa ChessAI để nhận depth động, thay ở đây
-                    _, move = ai.minimax(red_pieces, black_pieces, depth, float('-inf'), float('inf'), ai.is_red)
-                except Exception:
-                    move = ai.get_best_move(red_pieces, black_pieces, depth=3)
+            if is_ai_turn and ai_future is None:
+                # Độ sâu tối đa theo độ khó, thời gian theo đồng hồ còn lại của AI
+                ai_future = ai.request_move(red_pieces, black_pieces, depth=ai_depth,
+                                            time_limit=timer.move_budget(ai.is_red))
+                ai_started = pygame.time.get_ticks()
+            # Chỉ đi khi đã có kết quả và đã qua ít nhất 400ms để người chơi kịp nhìn
+            if is_ai_turn and ai_future.done() and pygame.time.get_ticks() - ai_started >= 400:
+                move = ai_future.result()
+                ai_future = None
 
                 if move:
                     s, e = move
@@ -353,17 +384,35 @@ def run_match(screen, sound: SoundManager, human_is_red: bool | None, ai_depth:
                                     loser_text  = "Bên Đen thua!"
                                     loser_is_human = (ai is not None and (not human_is_red))
                                 pieces[e] = pieces.pop(s)
+                                state.record_move(s, e, pieces[e], cap)
+                                state.set_winner(cap == "將")
                                 playing = False
                             else:
                                 pieces[e] = pieces.pop(s)
+                                state.record_move(s, e, pieces[e], cap)
                                 red_turn = not red_turn
                                 timer.switch_turn()
                                 turn_count += 1
                         else:
                             pieces[e] = pieces.pop(s)
+                            state.record_move(s, e, pieces[e])
                             red_turn = not red_turn
                             timer.switch_turn()
                             turn_count += 1
+                    # Tận dụng thời gian người chơi suy nghĩ: máy nghĩ trước trên nước đáp dự đoán
+                    if playing:
+                        ai.ponder(red_pieces, black_pieces, depth=ai_depth)
+                else:
+                    # AI không còn nước đi hợp lệ (bị chiếu hết hoặc bí) → AI thua
+                    if ai.is_red:
+                        winner_text = "Bên Đen thắng! Bên Đỏ hết nước đi."
+                        loser_text  = "Bên Đỏ thua!"
+                    else:
+                        winner_text = "Bên Đỏ thắng! Bên Đen hết nước đi."
+                        loser_text  = "Bên Đen thua!"
+                    loser_is_human = False
+                    state.set_winner(not ai.is_red)
+                    playing = False
 
         # Vẽ board + timer
         board.draw_board(black_pieces, red_pieces, valid_moves)
@@ -372,6 +421,12 @@ def run_match(screen, sound: SoundManager, human_is_red: bool | None, ai_depth:
 
         # Kết thúc → màn hình kết quả + lựa chọn
         if not playing:
+            if ai is not None:
+                ai.close()
+                ai = None
+            if state is not None:
+                state.save(config.GAME_RECORD_FILE, config.SAVE_UNFINISHED_GAMES)
+                state = None
             title_font = pygame.font.SysFont(None, 56)
             btn_font   = pygame.font.SysFont(None, 36)
             info_font  = pygame.font.SysFont(None, 28)
@@ -403,9 +458,10 @@ def run_match(screen, sound: SoundManager, human_is_red: bool | None, ai_depth:
                         return "MENU", None
 
             pygame.display.flip()
-            clock.tick(60)
 
-            
+        # Giữ 60 khung hình/giây cả khi máy đang nghĩ để vòng lặp không chiếm trọn một nhân của tiến trình tìm kiếm
+        clock.tick(60)
+
 
 
 # =========================
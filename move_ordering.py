@@ -0,0 +1,82 @@
+from pieces import NUM_SQUARES, KING, ADVISOR, ELEPHANT, HORSE, ROOK, CANNON, PAWN
+
+MAX_PLY = 128  # Số nửa nước tối đa tính từ gốc; ai.py dùng chung cho bảng killer và biên điểm chiếu hết
+
+# Thứ hạng giá trị quân dùng cho MVV-LVA (ăn quân to nhất bằng quân nhỏ nhất trước)
+ORDER_VALUES = [0] * 8
+ORDER_VALUES[PAWN] = 1
+ORDER_VALUES[ADVISOR] = 2
+ORDER_VALUES[ELEPHANT] = 2
+ORDER_VALUES[HORSE] = 4
+ORDER_VALUES[CANNON] = 4
+ORDER_VALUES[ROOK] = 9
+ORDER_VALUES[KING] = 20
+
+# MVV_LVA[nạn nhân][quân ăn]
+MVV_LVA = tuple(tuple(ORDER_VALUES[victim] * 32 - ORDER_VALUES[attacker] for attacker in range(8))
+                for victim in range(8))
+
+TT_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 28
+KILLER_SCORES = (1 << 27, (1 << 27) - 1)
+HISTORY_LIMIT = 1 << 26  # Giữ điểm lịch sử thấp hơn điểm killer
+
+
+class MoveOrderer:
+    """Sắp xếp nước đi: nước từ bảng chuyển vị/PV, ăn quân theo MVV-LVA, killer, rồi heuristic lịch sử."""
+
+    def __init__(self):
+        self.killers = [[0, 0] for _ in range(MAX_PLY)]
+        # Lịch sử theo (mã quân, ô đến), mã quân -7..7 dịch thành 0..14
+        self.history = [0] * (15 * NUM_SQUARES)
+
+    def clear(self):
+        for killers in self.killers:
+            killers[0] = killers[1] = 0
+        self.history = [0] * (15 * NUM_SQUARES)
+
+    def age(self):
+        """Giảm một nửa điểm lịch sử giữa các lần tìm kiếm để thông tin cũ mờ dần."""
+        self.history = [score >> 1 for score in self.history]
+        for killers in self.killers:
+            killers[0] = killers[1] = 0
+
+    def order(self, position, moves, ply, tt_move=0):
+        """Trả về danh sách nước đi đã sắp xếp, nước hứa hẹn nhất đứng đầu."""
+        board = position.board
+        history = self.history
+        killers = self.killers[ply] if ply < MAX_PLY else (0, 0)
+        scored = []
+        for move in moves:
+            if move == tt_move:
+                score = TT_MOVE_SCORE
+            else:
+                from_sq = move >> 8
+                to_sq = move & 0xFF
+                victim = board[to_sq]
+                if victim:
+                    score = CAPTURE_SCORE + MVV_LVA[abs(victim)][abs(board[from_sq])]
+                elif move == killers[0]:
+                    score = KILLER_SCORES[0]
+                elif move == killers[1]:
+                    score = KILLER_SCORES[1]
+                else:
+                    score = history[(board[from_sq] + 7) * NUM_SQUARES + to_sq]
+            scored.append((score, move))
+        scored.sort(reverse=True)
+        return [move for _, move in scored]
+
+    def record_cutoff(self, position, move, depth, ply):
+        """Cập nhật killer và lịch sử khi một nước đi yên tĩnh gây cắt tỉa (gọi trước khi đi nước đó)."""
+        board = position.board
+        if board[move & 0xFF]:
+            return  # Nước ăn quân đã được MVV-LVA xếp trước
+        if ply < MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        index = (board[move >> 8] + 7) * NUM_SQUARES + (move & 0xFF)
+        self.history[index] += depth * depth
+        if self.history[index] >= HISTORY_LIMIT:
+            self.history = [score >> 1 for score in self.history]
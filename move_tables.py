@@ -0,0 +1,170 @@
+from pieces import FILES, RANKS, NUM_SQUARES, RED, BLACK, ADVISOR, ELEPHANT, HORSE, ROOK, CANNON, PAWN
+
+# Bảng nước đi tính sẵn một lần khi import, dùng chung cho sinh nước đi,
+# kiểm tra chiếu và hàm lượng giá. Chỉ số bảng theo ô 0..89; bảng phụ thuộc
+# bên thì chỉ số thêm [RED]/[BLACK].
+
+ORTHOGONAL = ((1, 0), (-1, 0), (0, 1), (0, -1))
+DIAGONAL = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+
+
+def _on_board(x, y):
+    return 0 <= x < FILES and 0 <= y < RANKS
+
+
+def _in_palace(side, x, y):
+    if not 3 <= x <= 5:
+        return False
+    return 7 <= y <= 9 if side == RED else 0 <= y <= 2
+
+
+def _own_half(side, y):
+    return y >= 5 if side == RED else y <= 4
+
+
+def _build_rays():
+    """Bốn tia (phải, trái, xuống, lên) theo thứ tự từ gần đến xa."""
+    rays = []
+    for sq in range(NUM_SQUARES):
+        x, y = sq % FILES, sq // FILES
+        directions = []
+        for dx, dy in ORTHOGONAL:
+            ray = []
+            nx, ny = x + dx, y + dy
+            while _on_board(nx, ny):
+                ray.append(ny * FILES + nx)
+                nx += dx
+                ny += dy
+            directions.append(tuple(ray))
+        rays.append(tuple(directions))
+    return tuple(rays)
+
+
+def _build_horse():
+    """Nước mã (ô đến, chân mã) và chiều ngược (ô mã tấn công, chân mã)."""
+    moves = [[] for _ in range(NUM_SQUARES)]
+    attackers = [[] for _ in range(NUM_SQUARES)]
+    for sq in range(NUM_SQUARES):
+        x, y = sq % FILES, sq // FILES
+        for dx, dy in ORTHOGONAL:
+            lx, ly = x + dx, y + dy
+            if not _on_board(lx, ly):
+                continue
+            if dx:
+                targets = ((lx + dx, ly + 1), (lx + dx, ly - 1))
+            else:
+                targets = ((lx + 1, ly + dy), (lx - 1, ly + dy))
+            for tx, ty in targets:
+                if _on_board(tx, ty):
+                    to_sq = ty * FILES + tx
+                    leg = ly * FILES + lx
+                    moves[sq].append((to_sq, leg))
+                    attackers[to_sq].append((sq, leg))
+    return tuple(map(tuple, moves)), tuple(map(tuple, attackers))
+
+
+def _build_elephant():
+    """Nước tượng (ô đến, mắt tượng), không qua sông."""
+    tables = ([], [])
+    for side in (RED, BLACK):
+        for sq in range(NUM_SQUARES):
+            x, y = sq % FILES, sq // FILES
+            entries = []
+            if _own_half(side, y):
+                for dx, dy in DIAGONAL:
+                    tx, ty = x + 2 * dx, y + 2 * dy
+                    if _on_board(tx, ty) and _own_half(side, ty):
+                        entries.append((ty * FILES + tx, (y + dy) * FILES + x + dx))
+            tables[side].append(tuple(entries))
+    return tuple(map(tuple, tables))
+
+
+def _build_palace(steps):
+    tables = ([], [])
+    for side in (RED, BLACK):
+        for sq in range(NUM_SQUARES):
+            x, y = sq % FILES, sq // FILES
+            entries = ()
+            if _in_palace(side, x, y):
+                entries = tuple((y + dy) * FILES + x + dx for dx, dy in steps
+                                if _in_palace(side, x + dx, y + dy))
+            tables[side].append(entries)
+    return tuple(map(tuple, tables))
+
+
+def _build_pawn():
+    """Nước tốt theo từng bên và chiều ngược (ô tốt tấn công được ô đích)."""
+    moves = ([], [])
+    attackers = ([[] for _ in range(NUM_SQUARES)], [[] for _ in range(NUM_SQUARES)])
+    for side in (RED, BLACK):
+        forward = -1 if side == RED else 1
+        for sq in range(NUM_SQUARES):
+            x, y = sq % FILES, sq // FILES
+            steps = [(0, forward)]
+            if not _own_half(side, y):
+                steps += [(1, 0), (-1, 0)]  # Qua sông được đi ngang
+            entries = tuple((y + dy) * FILES + x + dx for dx, dy in steps if _on_board(x + dx, y + dy))
+            moves[side].append(entries)
+            for to_sq in entries:
+                attackers[side][to_sq].append(sq)
+    return (tuple(map(tuple, moves)),
+            tuple(tuple(map(tuple, table)) for table in attackers))
+
+
+RAYS = _build_rays()
+HORSE_MOVES, HORSE_ATTACKERS = _build_horse()
+ELEPHANT_MOVES = _build_elephant()
+ADVISOR_MOVES = _build_palace(DIAGONAL)
+KING_MOVES = _build_palace(ORTHOGONAL)
+PAWN_MOVES, PAWN_ATTACKERS = _build_pawn()
+
+
+def add_piece_moves(board, from_sq, kind, side, moves):
+    """Thêm các nước đi giả hợp lệ của một quân vào moves (dạng from << 8 | to).
+
+    board là mảng 90 ô có dấu: quân cùng bên mang dấu của side (Đỏ dương), quân địch ngược dấu.
+    """
+    sign = 1 if side == RED else -1
+    base = from_sq << 8
+    if kind == ROOK:
+        for ray in RAYS[from_sq]:
+            for to_sq in ray:
+                target = board[to_sq]
+                if target == 0:
+                    moves.append(base | to_sq)
+                else:
+                    if target * sign < 0:
+                        moves.append(base | to_sq)
+                    break
+    elif kind == CANNON:
+        for ray in RAYS[from_sq]:
+            screened = False
+            for to_sq in ray:
+                target = board[to_sq]
+                if not screened:
+                    if target == 0:
+                        moves.append(base | to_sq)
+                    else:
+                        screened = True  # Gặp ngòi pháo
+                elif target != 0:
+                    if target * sign < 0:
+                        moves.append(base | to_sq)
+                    break
+    elif kind == HORSE:
+        for to_sq, leg in HORSE_MOVES[from_sq]:
+            if board[leg] == 0 and board[to_sq] * sign <= 0:
+                moves.append(base | to_sq)
+    elif kind == ELEPHANT:
+        for to_sq, eye in ELEPHANT_MOVES[side][from_sq]:
+            if board[eye] == 0 and board[to_sq] * sign <= 0:
+                moves.append(base | to_sq)
+    else:
+        if kind == PAWN:
+            targets = PAWN_MOVES[side][from_sq]
+        elif kind == ADVISOR:
+            targets = ADVISOR_MOVES[side][from_sq]
+        else:
+            targets = KING_MOVES[side][from_sq]
+        for to_sq in targets:
+            if board[to_sq] * sign <= 0:
+                moves.append(base | to_sq)
@@ -0,0 +1,140 @@
+import argparse
+import mmap
+import os
+import random
+import struct
+import sys
+
+from game_record import is_record_file, read_games as read_records
+from position import Position, iccs_to_move, move_to_iccs
+
+# Mỗi bản ghi: khóa Zobrist 8 byte + nước đi 2 byte + trọng số 2 byte, sắp xếp theo khóa.
+# Khóa phụ thuộc vào hạt giống trong zobrist.py: đổi hạt giống thì phải dựng lại sách.
+RECORD = struct.Struct("<QHH")
+MAX_WEIGHT = 0xFFFF
+BOOK_PLIES = 20  # Chỉ lấy 20 nửa nước đầu của mỗi ván
+
+DEFAULT_BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "book.bin")
+DEFAULT_SOURCE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "openings.txt")
+
+
+def read_games(path):
+    """Đọc file ván cờ dạng văn bản: mỗi dòng một ván, các nước đi ICCS cách nhau bởi dấu cách, '#' là chú thích."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                yield line.split()
+
+
+def read_record_games(path):
+    """Đọc file ván cờ nhị phân (game_record.py) thành danh sách nước ICCS; bỏ qua ván không bắt đầu từ thế ban đầu."""
+    for start, moves, _ in read_records(path):
+        if start is None:
+            yield [move_to_iccs(move) for move in moves]
+
+
+def build_book(games, path, max_plies=BOOK_PLIES):
+    """Dựng sách khai cuộc từ các ván cờ (danh sách nước ICCS), trọng số là số lần (khóa, nước đi) xuất hiện.
+
+    Trả về số bản ghi đã ghi. Nước đi không hợp lệ làm hỏng cả ván nên báo ValueError.
+    """
+    counts = {}
+    for number, moves in enumerate(games, start=1):
+        position = Position.initial()
+        for text in moves[:max_plies]:
+            move = iccs_to_move(text)
+            if move not in position.generate_legal_moves():
+                raise ValueError("Ván %d: nước đi không hợp lệ %r" % (number, text))
+            counts[(position.key, move)] = counts.get((position.key, move), 0) + 1
+            position.make_move(move)
+    records = sorted(counts.items())
+    with open(path, "wb") as f:
+        for (key, move), weight in records:
+            f.write(RECORD.pack(key, move, min(weight, MAX_WEIGHT)))
+    return len(records)
+
+
+class OpeningBook:
+    """Đọc sách khai cuộc bằng mmap và tìm nhị phân: không tốn thời gian nạp, tra cứu cỡ micro giây."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        self.count = size // RECORD.size
+        # mmap không nhận file rỗng
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    @classmethod
+    def open_default(cls):
+        """Sách mặc định trong assets/, None nếu chưa dựng."""
+        if not os.path.exists(DEFAULT_BOOK_PATH):
+            return None
+        return cls(DEFAULT_BOOK_PATH)
+
+    def close(self):
+        if self.count:
+            self.data.close()
+        self.file.close()
+
+    def _key_at(self, index):
+        return RECORD.unpack_from(self.data, index * RECORD.size)[0]
+
+    def probe(self, key):
+        """Các nước đi trong sách cho khóa này, dạng [(move, weight)]."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        entries = []
+        while lo < self.count:
+            entry_key, move, weight = RECORD.unpack_from(self.data, lo * RECORD.size)
+            if entry_key != key:
+                break
+            entries.append((move, weight))
+            lo += 1
+        return entries
+
+    def choose(self, position, rng=random):
+        """Chọn ngẫu nhiên theo trọng số một nước đi hợp lệ trong sách, 0 nếu thế cờ không có trong sách."""
+        entries = self.probe(position.key)
+        if not entries:
+            return 0
+        legal = position.generate_legal_moves()
+        entries = [(move, weight) for move, weight in entries if move in legal]  # Phòng trùng khóa
+        if not entries:
+            return 0
+        pick = rng.randrange(sum(weight for _, weight in entries))
+        for move, weight in entries:
+            pick -= weight
+            if pick < 0:
+                return move
+        return entries[-1][0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dựng/tra sách khai cuộc")
+    parser.add_argument("games", nargs="?", default=DEFAULT_SOURCE_PATH, help="file ván cờ (mỗi dòng một ván, nước ICCS) hoặc file .xqr")
+    parser.add_argument("-o", "--output", default=DEFAULT_BOOK_PATH)
+    parser.add_argument("--plies", type=int, default=BOOK_PLIES)
+    parser.add_argument("--probe", metavar="FEN", help="in các nước trong sách cho thế cờ FEN thay vì dựng sách")
+    args = parser.parse_args(argv)
+
+    if args.probe:
+        book = OpeningBook(args.output)
+        for move, weight in book.probe(Position.from_fen(args.probe).key):
+            print("%s %d" % (move_to_iccs(move), weight))
+        book.close()
+        return 0
+    games = read_record_games(args.games) if is_record_file(args.games) else read_games(args.games)
+    count = build_book(games, args.output, args.plies)
+    print("%d records -> %s" % (count, args.output))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
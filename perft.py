@@ -0,0 +1,133 @@
+import argparse
+import sys
+import time
+
+from position import Position, move_to_iccs
+from bitboard import Bitboards
+from ai import ChessAI
+
+# Bộ thế cờ chuẩn với số nút perft đã biết (độ sâu 1, 2, 3, ...)
+REFERENCE_SUITE = [
+    ("start", "rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w - - 0 1",
+     (44, 1920, 79666, 3290240, 133312995)),
+    ("position 2", "r1ba1a3/4kn3/2n1b4/pNp1p1p1p/4c4/6P2/P1P2R2P/1CcC5/9/2BAKAB2 w - - 0 1",
+     (38, 1128, 43929, 1339047)),
+    ("position 3", "1cbak4/9/n2a5/2p1p3p/5cp2/2n2N3/6PCP/3AB4/2C6/3A1K1N1 w - - 0 1",
+     (7, 281, 8620, 326201)),
+    ("position 4", "5a3/3k5/3aR4/9/5r3/5n3/9/3A1A3/5K3/2BC2B2 w - - 0 1",
+     (25, 424, 9850, 202884)),
+    ("position 5", "CRN1k1b2/3ca4/4ba3/9/2nr5/9/9/4B4/4A4/4KA3 w - - 0 1",
+     (28, 516, 14808, 395483)),
+    ("position 6", "R1N1k1b2/9/3aba3/9/2nr5/2B6/9/4B4/4A4/4KA3 w - - 0 1",
+     (21, 364, 7626, 162837)),
+]
+
+
+def perft(position, depth):
+    """Đếm số nút lá hợp lệ ở độ sâu depth."""
+    moves = position.generate_legal_moves()
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        captured = position.make_move(move)
+        nodes += perft(position, depth - 1)
+        position.unmake_move(move, captured)
+    return nodes
+
+
+def divide(position, depth):
+    """Số nút theo từng nước đi ở gốc, dạng [(move, nodes)]."""
+    results = []
+    for move in position.generate_legal_moves():
+        if depth == 1:
+            results.append((move, 1))
+            continue
+        captured = position.make_move(move)
+        results.append((move, perft(position, depth - 1)))
+        position.unmake_move(move, captured)
+    return results
+
+
+def load_position(fen=None, bitboard=False):
+    position = Position.from_fen(fen) if fen else Position.initial()
+    return Bitboards.from_position(position) if bitboard else position
+
+
+def run_suite(max_depth, bitboard=False, out=sys.stdout):
+    """Chạy bộ thế cờ chuẩn, trả về True nếu mọi số nút đều khớp."""
+    all_passed = True
+    total_nodes = 0
+    start = time.perf_counter()
+    for name, fen, expected in REFERENCE_SUITE:
+        position = load_position(fen, bitboard)
+        for depth, expected_nodes in enumerate(expected[:max_depth], start=1):
+            t0 = time.perf_counter()
+            nodes = perft(position, depth)
+            elapsed = time.perf_counter() - t0
+            total_nodes += nodes
+            ok = nodes == expected_nodes
+            all_passed = all_passed and ok
+            out.write("%-18s depth %d  %10d  %s  %8.0f nps\n" % (
+                name, depth, nodes, "ok" if ok else "FAIL (expected %d)" % expected_nodes,
+                nodes / elapsed if elapsed > 0 else 0))
+    elapsed = time.perf_counter() - start
+    out.write("total %d nodes in %.2fs (%.0f nps)\n" % (total_nodes, elapsed, total_nodes / elapsed if elapsed > 0 else 0))
+    return all_passed
+
+
+def run_search_bench(depth, workers=1, out=sys.stdout):
+    """Đo thời gian tìm kiếm của ChessAI ở độ sâu cố định trên bộ thế cờ chuẩn."""
+    total_nodes = 0
+    start = time.perf_counter()
+    for name, fen, _ in REFERENCE_SUITE:
+        position = Position.from_fen(fen)
+        ai = ChessAI(position.red_turn, workers=workers)
+        t0 = time.perf_counter()
+        score, move = ai.iterative_deepening(position, depth)
+        elapsed = time.perf_counter() - t0
+        stats = ai.stats()
+        total_nodes += stats["nodes"]
+        out.write("%-18s depth %d  %-5s score %7s  %9d nodes  %6.2fs  tt hits %4.1f%%  first-move cuts %4.1f%%\n" % (
+            name, depth, move_to_iccs(move) if move else "-", score, stats["nodes"], elapsed,
+            100 * stats["tt_hit_rate"], 100 * stats["first_move_cutoff_rate"]))
+        ai.close()
+    elapsed = time.perf_counter() - start
+    out.write("total %d nodes in %.2fs (%.0f nps)\n" % (total_nodes, elapsed, total_nodes / elapsed if elapsed > 0 else 0))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perft cho bộ sinh nước đi cờ tướng")
+    parser.add_argument("depth", type=int, nargs="?", default=3)
+    parser.add_argument("--fen", help="thế cờ dạng FEN (mặc định: thế cờ ban đầu)")
+    parser.add_argument("--divide", action="store_true", help="in số nút theo từng nước đi ở gốc")
+    parser.add_argument("--bitboard", action="store_true", help="dùng backend bitboard")
+    parser.add_argument("--suite", action="store_true", help="chạy bộ perft chuẩn đến độ sâu depth")
+    parser.add_argument("--bench", action="store_true", help="đo tốc độ tìm kiếm của ChessAI ở độ sâu depth")
+    parser.add_argument("--workers", type=int, default=1, help="số tiến trình tìm kiếm song song khi --bench")
+    args = parser.parse_args(argv)
+
+    if args.suite:
+        return 0 if run_suite(args.depth, args.bitboard) else 1
+    if args.bench:
+        run_search_bench(args.depth, args.workers)
+        return 0
+
+    position = load_position(args.fen, args.bitboard)
+    start = time.perf_counter()
+    if args.divide:
+        results = divide(position, args.depth)
+        for move, nodes in sorted(results, key=lambda item: move_to_iccs(item[0])):
+            print("%s: %d" % (move_to_iccs(move), nodes))
+        nodes = sum(n for _, n in results)
+        print("moves: %d" % len(results))
+    else:
+        nodes = perft(position, args.depth)
+    elapsed = time.perf_counter() - start
+    print("nodes: %d" % nodes)
+    print("time: %.3fs  nps: %.0f" % (elapsed, nodes / elapsed if elapsed > 0 else 0))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,36 @@
+# Kích thước bàn cờ: 9 cột x 10 hàng, ô = y * 9 + x
+FILES = 9
+RANKS = 10
+NUM_SQUARES = FILES * RANKS
+
+# Mã quân (số nguyên nhỏ): dương = Đỏ, âm = Đen, 0 = ô trống
+EMPTY = 0
+KING, ADVISOR, ELEPHANT, HORSE, ROOK, CANNON, PAWN = range(1, 8)
+
+RED, BLACK = 0, 1
+
+# Ký tự quân <-> mã quân (車/馬 dùng chung cho hai bên nên phải biết quân thuộc dict nào)
+RED_CHAR_TO_CODE = {"帥": KING, "仕": ADVISOR, "相": ELEPHANT, "馬": HORSE, "傌": HORSE,
+                    "車": ROOK, "俥": ROOK, "炮": CANNON, "砲": CANNON, "兵": PAWN}
+BLACK_CHAR_TO_CODE = {"將": KING, "士": ADVISOR, "象": ELEPHANT, "馬": HORSE,
+                      "車": ROOK, "包": CANNON, "卒": PAWN}
+RED_CODE_TO_CHAR = {KING: "帥", ADVISOR: "仕", ELEPHANT: "相", HORSE: "馬",
+                    ROOK: "車", CANNON: "炮", PAWN: "兵"}
+BLACK_CODE_TO_CHAR = {KING: "將", ADVISOR: "士", ELEPHANT: "象", HORSE: "馬",
+                      ROOK: "車", CANNON: "包", PAWN: "卒"}
+
+
+# Giá trị quân theo mã quân (cùng thang điểm với evaluation, dùng cho SEE/sắp xếp nước đi)
+PIECE_VALUES = [0] * 8
+PIECE_VALUES[KING] = 10000
+PIECE_VALUES[ROOK] = 600
+PIECE_VALUES[CANNON] = 285
+PIECE_VALUES[HORSE] = 270
+PIECE_VALUES[ELEPHANT] = 120
+PIECE_VALUES[ADVISOR] = 120
+PIECE_VALUES[PAWN] = 30
+
+
 class PieceData:
     @staticmethod
     def get_initial_pieces():
@@ -14,4 +47,4 @@ class PieceData:
             red_text = text.replace("將", "帥").replace("卒", "兵").replace("包", "炮").replace("象", "相").replace("士", "仕")
             red_pieces[(x, 9 - y)] = red_text
 
-        return black_pieces, red_pieces
\ No newline at end of file
+        return black_pieces, red_pieces
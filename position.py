@@ -0,0 +1,406 @@
+from array import array
+
+from pieces import (PieceData, FILES, RANKS, NUM_SQUARES, EMPTY, RED, BLACK,
+                    KING, ADVISOR, ELEPHANT, HORSE, ROOK, CANNON, PAWN,
+                    RED_CHAR_TO_CODE, BLACK_CHAR_TO_CODE, RED_CODE_TO_CHAR, BLACK_CODE_TO_CHAR)
+from move_tables import add_piece_moves, RAYS, HORSE_ATTACKERS, PAWN_ATTACKERS
+from zobrist import PIECE_KEYS, SIDE_KEY, compute_key
+from evaluation import MG_TABLE, EG_TABLE, PHASE_WEIGHTS
+
+
+def square(x, y):
+    """Đổi tọa độ (x, y) sang chỉ số ô 0..89."""
+    return y * FILES + x
+
+
+def coords(sq):
+    """Đổi chỉ số ô sang tọa độ (x, y)."""
+    return sq % FILES, sq // FILES
+
+
+# Nước đi được gói thành một số nguyên: (ô đi << 8) | ô đến
+def encode_move(from_sq, to_sq):
+    return (from_sq << 8) | to_sq
+
+
+def move_from(move):
+    return move >> 8
+
+
+def move_to(move):
+    return move & 0xFF
+
+
+# Ký hiệu ICCS: cột a..i từ trái sang, hàng 0..9 tính từ phía Đỏ (ví dụ "h2e2")
+def move_to_iccs(move):
+    from_x, from_y = coords(move >> 8)
+    to_x, to_y = coords(move & 0xFF)
+    return "%s%d%s%d" % ("abcdefghi"[from_x], 9 - from_y, "abcdefghi"[to_x], 9 - to_y)
+
+
+def iccs_to_move(text):
+    text = text.strip().lower()
+    from_sq = square("abcdefghi".index(text[0]), 9 - int(text[1]))
+    to_sq = square("abcdefghi".index(text[2]), 9 - int(text[3]))
+    return (from_sq << 8) | to_sq
+
+
+# Chữ cái FEN -> mã quân (chữ hoa = Đỏ, chữ thường = Đen)
+FEN_TO_CODE = {"k": KING, "a": ADVISOR, "b": ELEPHANT, "e": ELEPHANT, "n": HORSE, "h": HORSE,
+               "r": ROOK, "c": CANNON, "p": PAWN}
+CODE_TO_FEN = {KING: "k", ADVISOR: "a", ELEPHANT: "b", HORSE: "n", ROOK: "r", CANNON: "c", PAWN: "p"}
+START_FEN = "rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w - - 0 1"
+
+# Mã hóa nén 4 bit mỗi ô: 0 = trống, 1..7 = quân Đỏ, 9..15 = quân Đen (8 | loại quân).
+# 90 ô = 45 byte, thêm 1 byte lượt đi = 46 byte; hai thế cờ giống nhau luôn cho cùng chuỗi byte.
+PACKED_BYTES = NUM_SQUARES // 2 + 1
+# Byte của bàn cờ (mã có dấu, -7..7) <-> nibble
+_TO_NIBBLE = bytes(b if b < 8 else 8 | (256 - b) if b > 248 else 0 for b in range(256))
+_FROM_NIBBLE = bytes(n if n < 8 else -(n & 7) & 0xFF for n in range(16)) + bytes(240)
+_HIGH_NIBBLE = bytes(b >> 4 for b in range(256))
+_LOW_NIBBLE = bytes(b & 15 for b in range(256))
+
+
+class Position:
+    """Thế cờ dạng mảng 90 ô (mailbox) với mã quân số nguyên và danh sách quân."""
+
+    def __init__(self):
+        self.board = array('b', bytes(NUM_SQUARES))
+        self.red_turn = True
+        # Danh sách ô đang có quân của từng bên: [RED], [BLACK]
+        self.piece_lists = (set(), set())
+        self.king_squares = [-1, -1]
+        # Khóa Zobrist cập nhật dần theo từng nước, và khóa của các thế trước đó (để phát hiện lặp)
+        self.key = 0
+        self.history = []
+        # Chỉ số trong history của các thế ngay sau một nước ăn quân hoặc đi tốt: thế trước đó không thể lặp lại
+        self.irreversible = [0]
+        # Tổng điểm vật chất + vị trí (góc nhìn Đỏ) và giai đoạn ván cờ, cập nhật dần
+        self.mg = 0
+        self.eg = 0
+        self.phase = 0
+
+    @property
+    def side(self):
+        return RED if self.red_turn else BLACK
+
+    def put(self, sq, code):
+        """Đặt quân (mã có dấu) lên ô trống."""
+        self.board[sq] = code
+        self.key ^= PIECE_KEYS[code + 7][sq]
+        self.mg += MG_TABLE[code + 7][sq]
+        self.eg += EG_TABLE[code + 7][sq]
+        self.phase += PHASE_WEIGHTS[abs(code)]
+        side = RED if code > 0 else BLACK
+        self.piece_lists[side].add(sq)
+        if abs(code) == KING:
+            self.king_squares[side] = sq
+
+    def remove(self, sq):
+        """Nhấc quân khỏi ô, trả về mã quân."""
+        code = self.board[sq]
+        self.board[sq] = EMPTY
+        self.key ^= PIECE_KEYS[code + 7][sq]
+        self.mg -= MG_TABLE[code + 7][sq]
+        self.eg -= EG_TABLE[code + 7][sq]
+        self.phase -= PHASE_WEIGHTS[abs(code)]
+        side = RED if code > 0 else BLACK
+        self.piece_lists[side].discard(sq)
+        if abs(code) == KING:
+            self.king_squares[side] = -1
+        return code
+
+    def piece_at(self, x, y):
+        return self.board[y * FILES + x]
+
+    def make_move(self, move):
+        """Đi quân ngay trên thế cờ, trả về bản ghi hoàn tác (mã quân bị ăn, 0 nếu không ăn)."""
+        from_sq = move >> 8
+        to_sq = move & 0xFF
+        board = self.board
+        piece = board[from_sq]
+        captured = board[to_sq]
+        side = RED if piece > 0 else BLACK
+        own = self.piece_lists[side]
+        own.discard(from_sq)
+        own.add(to_sq)
+        if captured:
+            self.piece_lists[side ^ 1].discard(to_sq)
+            if captured == KING or captured == -KING:
+                self.king_squares[side ^ 1] = -1
+        if piece == KING or piece == -KING:
+            self.king_squares[side] = to_sq
+        board[to_sq] = piece
+        board[from_sq] = EMPTY
+        self.history.append(self.key)
+        if captured or piece == PAWN or piece == -PAWN:
+            self.irreversible.append(len(self.history))
+        keys = PIECE_KEYS[piece + 7]
+        key = self.key ^ keys[from_sq] ^ keys[to_sq] ^ SIDE_KEY
+        mg_row = MG_TABLE[piece + 7]
+        eg_row = EG_TABLE[piece + 7]
+        self.mg += mg_row[to_sq] - mg_row[from_sq]
+        self.eg += eg_row[to_sq] - eg_row[from_sq]
+        if captured:
+            key ^= PIECE_KEYS[captured + 7][to_sq]
+            self.mg -= MG_TABLE[captured + 7][to_sq]
+            self.eg -= EG_TABLE[captured + 7][to_sq]
+            self.phase -= PHASE_WEIGHTS[abs(captured)]
+        self.key = key
+        self.red_turn = not self.red_turn
+        return captured
+
+    def unmake_move(self, move, captured):
+        """Hoàn tác nước đi đã thực hiện bằng make_move."""
+        from_sq = move >> 8
+        to_sq = move & 0xFF
+        board = self.board
+        piece = board[to_sq]
+        side = RED if piece > 0 else BLACK
+        own = self.piece_lists[side]
+        own.discard(to_sq)
+        own.add(from_sq)
+        if piece == KING or piece == -KING:
+            self.king_squares[side] = from_sq
+        board[from_sq] = piece
+        board[to_sq] = captured
+        mg_row = MG_TABLE[piece + 7]
+        eg_row = EG_TABLE[piece + 7]
+        self.mg += mg_row[from_sq] - mg_row[to_sq]
+        self.eg += eg_row[from_sq] - eg_row[to_sq]
+        if captured:
+            self.piece_lists[side ^ 1].add(to_sq)
+            if captured == KING or captured == -KING:
+                self.king_squares[side ^ 1] = to_sq
+            self.mg += MG_TABLE[captured + 7][to_sq]
+            self.eg += EG_TABLE[captured + 7][to_sq]
+            self.phase += PHASE_WEIGHTS[abs(captured)]
+        if captured or piece == PAWN or piece == -PAWN:
+            self.irreversible.pop()
+        self.key = self.history.pop()
+        self.red_turn = not self.red_turn
+
+    def make_null_move(self):
+        """Nhường lượt (dùng cho cắt tỉa nước trống trong tìm kiếm)."""
+        self.history.append(self.key)
+        self.key ^= SIDE_KEY
+        self.red_turn = not self.red_turn
+
+    def unmake_null_move(self):
+        self.key = self.history.pop()
+        self.red_turn = not self.red_turn
+
+    def has_attackers(self, side):
+        """Bên side còn Xe/Mã/Pháo không (ít quân tấn công thì dễ rơi vào thế bị bắt buộc đi)."""
+        board = self.board
+        for sq in self.piece_lists[side]:
+            kind = abs(board[sq])
+            if kind == ROOK or kind == HORSE or kind == CANNON:
+                return True
+        return False
+
+    def generate_moves(self):
+        """Sinh các nước đi giả hợp lệ (chưa xét tướng bị chiếu) cho bên đang đi."""
+        board = self.board
+        side = self.side
+        sign = 1 if side == RED else -1
+        moves = []
+        for from_sq in self.piece_lists[side]:
+            add_piece_moves(board, from_sq, board[from_sq] * sign, side, moves)
+        return moves
+
+    def in_check(self, side):
+        """Tướng của side có bị chiếu không: chỉ xét các tia, chân mã và ô tốt quanh tướng."""
+        king_sq = self.king_squares[side]
+        if king_sq < 0:
+            return True
+        board = self.board
+        sign = -1 if side == RED else 1  # Dấu quân đối phương
+        enemy_rook = ROOK * sign
+        enemy_cannon = CANNON * sign
+        enemy_king = KING * sign
+        rays = RAYS[king_sq]
+        for direction in range(4):
+            screened = False
+            for sq in rays[direction]:
+                piece = board[sq]
+                if piece == EMPTY:
+                    continue
+                if screened:
+                    if piece == enemy_cannon:
+                        return True
+                    break
+                # Xe chiếu, hoặc hai tướng đối mặt trên cùng cột (tia 2, 3 là tia dọc)
+                if piece == enemy_rook or (piece == enemy_king and direction >= 2):
+                    return True
+                screened = True
+        enemy_horse = HORSE * sign
+        for from_sq, leg in HORSE_ATTACKERS[king_sq]:
+            if board[from_sq] == enemy_horse and board[leg] == EMPTY:
+                return True
+        enemy_pawn = PAWN * sign
+        for from_sq in PAWN_ATTACKERS[side ^ 1][king_sq]:
+            if board[from_sq] == enemy_pawn:
+                return True
+        return False
+
+    def generate_legal_moves(self):
+        """Sinh nước đi giả hợp lệ rồi loại các nước để tướng mình bị chiếu."""
+        side = self.side
+        legal_moves = []
+        for move in self.generate_moves():
+            captured = self.make_move(move)
+            if not self.in_check(side):
+                legal_moves.append(move)
+            self.unmake_move(move, captured)
+        return legal_moves
+
+    def repetition_count(self):
+        """Số lần thế cờ hiện tại đã xuất hiện trước đó (cùng bên đi), chỉ xét từ nước ăn quân/đi tốt gần nhất."""
+        key = self.key
+        history = self.history
+        return sum(1 for i in range(len(history) - 2, self.irreversible[-1] - 1, -2) if history[i] == key)
+
+    def is_repetition(self):
+        """Thế cờ hiện tại đã xuất hiện trước đó chưa; dừng ở lần trùng đầu tiên (dùng trong tìm kiếm)."""
+        key = self.key
+        history = self.history
+        for i in range(len(history) - 2, self.irreversible[-1] - 1, -2):
+            if history[i] == key:
+                return True
+        return False
+
+    def copy(self):
+        other = Position()
+        other.board = array('b', self.board)
+        other.red_turn = self.red_turn
+        other.piece_lists = (set(self.piece_lists[RED]), set(self.piece_lists[BLACK]))
+        other.king_squares = list(self.king_squares)
+        other.key = self.key
+        other.mg, other.eg, other.phase = self.mg, self.eg, self.phase
+        other.history = list(self.history)
+        other.irreversible = list(self.irreversible)
+        return other
+
+    def to_bytes(self):
+        """Mã hóa gọn để gửi sang tiến trình khác: 90 byte bàn cờ + 1 byte lượt đi + chỉ số nước ăn quân/đi tốt
+        gần nhất + các khóa lịch sử."""
+        return (self.board.tobytes() + bytes((self.side,))
+                + array('Q', [self.irreversible[-1]] + self.history).tobytes())
+
+    @classmethod
+    def from_bytes(cls, data):
+        position = cls()
+        board = array('b')
+        board.frombytes(data[:NUM_SQUARES])
+        for sq, code in enumerate(board):
+            if code:
+                position.put(sq, code)
+        position.red_turn = data[NUM_SQUARES] == RED
+        position.key = compute_key(position.board, position.red_turn)
+        history = array('Q', data[NUM_SQUARES + 1:]).tolist()
+        position.irreversible = [history[0]]
+        position.history = history[1:]
+        return position
+
+    def pack(self):
+        """Mã hóa nén 46 byte (không kèm lịch sử), dùng làm khóa băm hoặc lưu hàng loạt."""
+        nibbles = self.board.tobytes().translate(_TO_NIBBLE)
+        # Mỗi nibble < 16 nên dịch cả số nguyên lớn 4 bit không tràn sang byte bên cạnh
+        packed = (int.from_bytes(nibbles[0::2], "big") << 4) | int.from_bytes(nibbles[1::2], "big")
+        return packed.to_bytes(NUM_SQUARES // 2, "big") + bytes((self.side,))
+
+    @classmethod
+    def unpack(cls, data):
+        """Giải mã chuỗi từ pack()."""
+        if len(data) != PACKED_BYTES:
+            raise ValueError("Thế cờ nén phải dài %d byte" % PACKED_BYTES)
+        cells = bytearray(NUM_SQUARES)
+        body = data[:NUM_SQUARES // 2]
+        cells[0::2] = body.translate(_HIGH_NIBBLE)
+        cells[1::2] = body.translate(_LOW_NIBBLE)
+        board = array('b')
+        board.frombytes(bytes(cells).translate(_FROM_NIBBLE))
+        position = cls()
+        for sq, code in enumerate(board):
+            if code:
+                position.put(sq, code)
+        position.red_turn = data[-1] == RED
+        if not position.red_turn:
+            position.key ^= SIDE_KEY
+        return position
+
+    def to_fen(self):
+        """Chuỗi FEN cờ tướng (hàng đầu tiên là hàng y = 0 phía Đen, chữ hoa = Đỏ)."""
+        rows = []
+        board = self.board
+        for y in range(RANKS):
+            row = ""
+            empty = 0
+            for x in range(FILES):
+                code = board[y * FILES + x]
+                if not code:
+                    empty += 1
+                    continue
+                if empty:
+                    row += str(empty)
+                    empty = 0
+                letter = CODE_TO_FEN[abs(code)]
+                row += letter.upper() if code > 0 else letter
+            if empty:
+                row += str(empty)
+            rows.append(row)
+        return "%s %s - - 0 %d" % ("/".join(rows), "w" if self.red_turn else "b", len(self.history) // 2 + 1)
+
+    @classmethod
+    def from_dicts(cls, red_pieces, black_pieces, red_turn=True):
+        """Tạo thế cờ từ cặp dict {(x, y): ký tự} đang dùng trong game."""
+        position = cls()
+        for (x, y), text in red_pieces.items():
+            position.put(square(x, y), RED_CHAR_TO_CODE[text])
+        for (x, y), text in black_pieces.items():
+            position.put(square(x, y), -BLACK_CHAR_TO_CODE[text])
+        position.red_turn = red_turn
+        position.key = compute_key(position.board, red_turn)
+        return position
+
+    def to_dicts(self):
+        """Trả về cặp dict (red_pieces, black_pieces) theo định dạng cũ."""
+        red_pieces = {}
+        black_pieces = {}
+        for sq in self.piece_lists[RED]:
+            red_pieces[coords(sq)] = RED_CODE_TO_CHAR[self.board[sq]]
+        for sq in self.piece_lists[BLACK]:
+            black_pieces[coords(sq)] = BLACK_CODE_TO_CHAR[-self.board[sq]]
+        return red_pieces, black_pieces
+
+    @classmethod
+    def from_fen(cls, fen):
+        """Đọc thế cờ từ chuỗi FEN cờ tướng (hàng đầu tiên là hàng y = 0 phía Đen)."""
+        fields = fen.split()
+        rows = fields[0].split("/")
+        if len(rows) != RANKS:
+            raise ValueError("FEN phải có 10 hàng: %r" % fen)
+        position = cls()
+        for y, row in enumerate(rows):
+            x = 0
+            for char in row:
+                if char.isdigit():
+                    x += int(char)
+                    continue
+                if x >= FILES or char.lower() not in FEN_TO_CODE:
+                    raise ValueError("FEN không hợp lệ: %r" % fen)
+                code = FEN_TO_CODE[char.lower()]
+                position.put(y * FILES + x, code if char.isupper() else -code)
+                x += 1
+            if x != FILES:
+                raise ValueError("Hàng %d của FEN không đủ 9 cột: %r" % (y, fen))
+        position.red_turn = len(fields) < 2 or fields[1].lower() in ("w", "r")
+        position.key = compute_key(position.board, position.red_turn)
+        return position
+
+    @classmethod
+    def initial(cls):
+        """Thế cờ ban đầu lấy từ PieceData."""
+        black_pieces, red_pieces = PieceData.get_initial_pieces()
+        return cls.from_dicts(red_pieces, black_pieces)
@@ -0,0 +1,78 @@
+from pieces import PIECE_VALUES, EMPTY, RED, KING, ADVISOR, ELEPHANT, HORSE, ROOK, CANNON, PAWN
+from move_tables import RAYS, HORSE_ATTACKERS, ELEPHANT_MOVES, ADVISOR_MOVES, KING_MOVES, PAWN_ATTACKERS
+
+
+def least_valuable_attacker(position, target, side):
+    """Ô của quân rẻ nhất bên side đang tấn công ô target, -1 nếu không có.
+
+    Tính lại trên bàn cờ hiện tại nên ngòi pháo, chân mã, mắt tượng thay đổi sau mỗi lần ăn đều được xét.
+    """
+    board = position.board
+    sign = 1 if side == RED else -1
+
+    pawn = PAWN * sign
+    for from_sq in PAWN_ATTACKERS[side][target]:
+        if board[from_sq] == pawn:
+            return from_sq
+    advisor = ADVISOR * sign
+    for from_sq in ADVISOR_MOVES[side][target]:
+        if board[from_sq] == advisor:
+            return from_sq
+    elephant = ELEPHANT * sign
+    for from_sq, eye in ELEPHANT_MOVES[side][target]:
+        if board[from_sq] == elephant and board[eye] == EMPTY:
+            return from_sq
+    horse = HORSE * sign
+    for from_sq, leg in HORSE_ATTACKERS[target]:
+        if board[from_sq] == horse and board[leg] == EMPTY:
+            return from_sq
+
+    # Xe là quân đầu tiên trên tia, pháo là quân thứ hai (sau ngòi)
+    rook = ROOK * sign
+    cannon = CANNON * sign
+    rook_sq = -1
+    for ray in RAYS[target]:
+        screened = False
+        for sq in ray:
+            piece = board[sq]
+            if piece == EMPTY:
+                continue
+            if screened:
+                if piece == cannon:
+                    return sq
+                break
+            if piece == rook:
+                rook_sq = sq
+            screened = True
+    if rook_sq >= 0:
+        return rook_sq
+
+    king = KING * sign
+    for from_sq in KING_MOVES[side][target]:
+        if board[from_sq] == king:
+            return from_sq
+    return -1
+
+
+def static_exchange(position, move):
+    """Đánh giá trao đổi tĩnh (SEE) của nước ăn quân: lợi thế vật chất sau chuỗi ăn qua lại ở ô đích.
+
+    Thực hiện các nước ăn ngay trên thế cờ rồi hoàn tác, không xét quân bị ghim.
+    """
+    target = move & 0xFF
+    gains = [PIECE_VALUES[abs(position.board[target])]]
+    made = [(move, position.make_move(move))]
+    while True:
+        from_sq = least_valuable_attacker(position, target, position.side)
+        if from_sq < 0:
+            break
+        # Giá trị quân đang đứng ở ô đích (sắp bị ăn) trừ phần lợi trước đó
+        gains.append(PIECE_VALUES[abs(position.board[target])] - gains[-1])
+        capture = (from_sq << 8) | target
+        made.append((capture, position.make_move(capture)))
+    for capture, captured in reversed(made):
+        position.unmake_move(capture, captured)
+    # Mỗi bên được chọn dừng trao đổi nếu ăn tiếp bất lợi
+    for i in range(len(gains) - 1, 0, -1):
+        gains[i - 1] = -max(-gains[i - 1], gains[i])
+    return gains[0]
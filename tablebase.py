@@ -0,0 +1,338 @@
+import argparse
+import os
+import sys
+import time
+from array import array
+
+from pieces import FILES, RANKS, NUM_SQUARES, KING, ADVISOR, ELEPHANT, HORSE, ROOK, CANNON, PAWN
+from position import Position
+
+# Bảng tàn cuộc: khoảng cách đến chiếu hết (DTM, tính theo nửa nước) cho các thế ít quân, dựng bằng
+# phân tích ngược. Bên mạnh luôn là Đỏ (thế cờ bên Đen mạnh được lật lại khi tra), bên yếu chỉ có
+# Tướng và Sĩ/Tượng. Mỗi thế cờ là 1 byte: 0 = hòa, n > 0 = bên đi thắng/thua sau n - 1 nửa nước
+# (n - 1 lẻ: thắng, chẵn: thua). Luật cấm chiếu/đuổi dai không được xét.
+
+PIECE_LETTERS = {KING: "K", ADVISOR: "A", ELEPHANT: "B", HORSE: "N", ROOK: "R", CANNON: "C", PAWN: "P"}
+LETTER_CODES = {letter: code for code, letter in PIECE_LETTERS.items()}
+ATTACKERS = (HORSE, ROOK, CANNON, PAWN)
+DEFENDERS = (ADVISOR, ELEPHANT)
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "tablebases")
+# Không có KCK: Tướng + Pháo không chiếu hết được Tướng trơ nên bảng đó toàn hòa
+DEFAULT_TABLES = ("KRK", "KNK", "KPK", "KRKA", "KRKB", "KRKAB")
+MAX_DTM = 254
+
+
+def _red_region(kind):
+    """Các ô quân Đỏ loại kind có thể đứng (quân Đen: lật theo chiều dọc)."""
+    if kind == KING:
+        return [y * FILES + x for y in range(7, 10) for x in range(3, 6)]
+    if kind == ADVISOR:
+        return [y * FILES + x for x, y in ((3, 7), (5, 7), (4, 8), (3, 9), (5, 9))]
+    if kind == ELEPHANT:
+        return [y * FILES + x for x, y in ((2, 5), (6, 5), (0, 7), (4, 7), (8, 7), (2, 9), (6, 9))]
+    if kind == PAWN:
+        return [y * FILES + x for y in range(7) for x in range(FILES) if y <= 4 or x % 2 == 0]
+    return list(range(NUM_SQUARES))
+
+
+def mirror_square(sq):
+    return (RANKS - 1 - sq // FILES) * FILES + sq % FILES
+
+
+REGIONS = {}
+for _kind in range(KING, PAWN + 1):
+    REGIONS[_kind] = _red_region(_kind)
+    REGIONS[-_kind] = sorted(mirror_square(sq) for sq in REGIONS[_kind])
+
+
+def parse_name(name):
+    """'KRKA' -> (1, 5, -1, -2): quân Đỏ rồi quân Đen, mỗi bên sắp theo mã quân (Tướng đứng đầu)."""
+    black_start = name.index("K", 1)
+    red = sorted(LETTER_CODES[c] for c in name[:black_start])
+    black = sorted(LETTER_CODES[c] for c in name[black_start:])
+    if red[0] != KING or black[0] != KING or red.count(KING) != 1 or black.count(KING) != 1:
+        raise ValueError("Mỗi bên phải có đúng một Tướng: %r" % name)
+    if not any(kind in ATTACKERS for kind in red) or any(kind not in DEFENDERS for kind in black[1:]):
+        raise ValueError("Bên Đỏ phải có quân tấn công, bên Đen chỉ có Sĩ/Tượng: %r" % name)
+    return tuple(red) + tuple(-kind for kind in black)
+
+
+def config_name(config):
+    return "".join(PIECE_LETTERS[abs(code)] for code in config)
+
+
+def material_config(position, mirror=False):
+    """Cấu hình quân của thế cờ theo dạng parse_name (mirror: đổi vai hai bên)."""
+    board = position.board
+    sign = -1 if mirror else 1
+    red = sorted(abs(code) for code in board if code * sign > 0)
+    black = sorted(abs(code) for code in board if code * sign < 0)
+    return tuple(red) + tuple(-kind for kind in black)
+
+
+class TableLayout:
+    """Chỉ số thế cờ: cơ số hỗn hợp theo vị trí của từng quân trong vùng của nó, bit thấp nhất là bên đi."""
+
+    def __init__(self, config):
+        self.config = config
+        self.regions = [REGIONS[code] for code in config]
+        self.region_index = []
+        for region in self.regions:
+            lookup = [-1] * NUM_SQUARES
+            for i, sq in enumerate(region):
+                lookup[sq] = i
+            self.region_index.append(lookup)
+        self.multipliers = []
+        size = 2
+        for region in self.regions:
+            self.multipliers.append(size)
+            size *= len(region)
+        self.size = size
+
+    def decode(self, index):
+        squares = []
+        rest = index >> 1
+        for region in self.regions:
+            rest, i = divmod(rest, len(region))
+            squares.append(region[i])
+        return squares, index & 1
+
+    def encode(self, squares, black_turn):
+        """Chỉ số của thế cờ, None nếu có quân đứng ngoài vùng của nó (ví dụ Sĩ/Tượng sai ô khi đọc từ FEN)."""
+        index = black_turn
+        for lookup, multiplier, sq in zip(self.region_index, self.multipliers, squares):
+            i = lookup[sq]
+            if i < 0:
+                return None
+            index += i * multiplier
+        return index
+
+
+def _position(config, squares, black_turn):
+    position = Position()
+    for code, sq in zip(config, squares):
+        position.put(sq, code)
+    position.red_turn = not black_turn
+    return position
+
+
+def generate(config, tables, log=None):
+    """Dựng bảng DTM cho cấu hình config bằng phân tích ngược.
+
+    tables: {config: array('B')} các bảng con (sau khi bên Đỏ ăn một quân Đen) đã dựng sẵn.
+    """
+    layout = TableLayout(config)
+    size = layout.size
+    multipliers = layout.multipliers
+    region_index = layout.region_index
+    values = array('B', bytes(size))
+    layouts = {}  # Bố cục các bảng con, dùng lại cho mọi nước ăn quân
+
+    # Bước 1: sinh nước đi một lần cho mọi thế cờ, lưu thế cờ con dạng CSR
+    starts = array('I', bytes(4 * (size + 1)))
+    children = array('I')
+    remaining = array('H', bytes(2 * size))  # Số nước chưa biết là thua cho bên đi
+    longest = array('B', bytes(size))  # DTM lớn nhất của các nước dẫn sang bảng con mà đối phương thắng
+    buckets = [[] for _ in range(MAX_DTM + 2)]
+    t0 = time.perf_counter()
+    for index in range(size):
+        starts[index] = len(children)
+        squares, black_turn = layout.decode(index)
+        if len(set(squares)) != len(squares):
+            continue
+        position = _position(config, squares, black_turn)
+        if position.in_check(black_turn ^ 1):
+            continue  # Bên vừa đi đang bị chiếu: thế cờ không hợp lệ
+        moves = position.generate_legal_moves()
+        if not moves:
+            buckets[0].append(index)  # Hết nước đi là thua
+            continue
+        count = 0
+        base = index ^ 1
+        for move in moves:
+            from_sq = move >> 8
+            to_sq = move & 0xFF
+            piece = squares.index(from_sq)
+            if position.board[to_sq]:
+                value = _capture_value(config, squares, piece, squares.index(to_sq), to_sq, black_turn, tables,
+                                       layouts)
+                if not value:
+                    count += 1  # Hòa: nước này không bao giờ thua
+                elif (value - 1) % 2 == 0:
+                    buckets[value].append(index)  # Đối phương thua sau value - 1 nửa nước: ta thắng sau value
+                elif value > longest[index]:
+                    longest[index] = value
+                continue
+            count += 1
+            children.append(base + (region_index[piece][to_sq] - region_index[piece][from_sq]) * multipliers[piece])
+        remaining[index] = count
+        if not count and longest[index]:
+            buckets[longest[index]].append(index)  # Mọi nước đều dẫn sang thế đối phương thắng
+    starts[size] = len(children)
+    if log:
+        log("%s: %d positions, %d moves generated in %.1fs" % (config_name(config), size, len(children),
+                                                               time.perf_counter() - t0))
+
+    # Bước 2: đảo CSR để có danh sách thế cờ cha
+    parent_starts = array('I', bytes(4 * (size + 1)))
+    for child in children:
+        parent_starts[child + 1] += 1
+    for i in range(size):
+        parent_starts[i + 1] += parent_starts[i]
+    fill = array('I', parent_starts)
+    parents = array('I', bytes(4 * len(children)))
+    for index in range(size):
+        for child in children[starts[index]:starts[index + 1]]:
+            parents[fill[child]] = index
+            fill[child] += 1
+    del children, fill
+
+    # Bước 3: lan truyền theo DTM tăng dần; thế thua (DTM chẵn) làm cha thắng, thế thắng giảm bộ đếm của cha
+    for dtm in range(MAX_DTM + 1):
+        for index in buckets[dtm]:
+            if values[index]:
+                continue
+            values[index] = dtm + 1
+            for parent in parents[parent_starts[index]:parent_starts[index + 1]]:
+                if values[parent]:
+                    continue
+                if dtm % 2 == 0:
+                    buckets[dtm + 1].append(parent)
+                else:
+                    remaining[parent] -= 1
+                    if not remaining[parent]:
+                        buckets[max(dtm, longest[parent] - 1) + 1].append(parent)
+        buckets[dtm] = None
+    if log:
+        log("%s: done in %.1fs" % (config_name(config), time.perf_counter() - t0))
+    return values
+
+
+def _capture_value(config, squares, piece, victim, to_sq, black_turn, tables, layouts):
+    """Giá trị (dạng byte của bảng) của thế cờ sau nước ăn quân, theo góc nhìn bên đi tiếp theo."""
+    if config[victim] > 0:
+        rest = [code for i, code in enumerate(config) if i != victim]
+        if not any(code in ATTACKERS for code in rest):
+            return 0  # Đỏ mất quân tấn công cuối cùng: coi như hòa
+    sub_config = config[:victim] + config[victim + 1:]
+    sub_squares = squares[:victim] + squares[victim + 1:]
+    moved = piece if piece < victim else piece - 1
+    sub_squares[moved] = to_sq
+    # Các quân cùng loại có thể phải đổi chỗ để giữ đúng thứ tự cấu hình — vùng của chúng trùng nhau nên vẫn hợp lệ
+    table = tables.get(sub_config)
+    if table is None:
+        return 0
+    layout = layouts.get(sub_config)
+    if layout is None:
+        layout = layouts[sub_config] = TableLayout(sub_config)
+    return table[layout.encode(sub_squares, black_turn ^ 1)]
+
+
+def dependencies(config):
+    """Các cấu hình con cần dựng trước (Đỏ ăn một quân Sĩ/Tượng của Đen, hoặc Đen ăn một quân Đỏ)."""
+    result = []
+    for i, code in enumerate(config):
+        if abs(code) == KING:
+            continue
+        sub = config[:i] + config[i + 1:]
+        if any(c in ATTACKERS for c in sub) and sub not in result:
+            result.append(sub)
+    return result
+
+
+def table_path(directory, config):
+    return os.path.join(directory, config_name(config) + ".tb")
+
+
+def build(names, directory=DEFAULT_DIR, log=print):
+    """Dựng (kèm các bảng con) và ghi ra directory/<tên>.tb dạng mảng byte liền."""
+    os.makedirs(directory, exist_ok=True)
+    tables = {}
+
+    def build_one(config):
+        if config in tables:
+            return
+        for sub in dependencies(config):
+            build_one(sub)
+        path = table_path(directory, config)
+        if os.path.exists(path):
+            tables[config] = load_table(path, config)
+            return
+        tables[config] = generate(config, tables, log)
+        with open(path, "wb") as f:
+            tables[config].tofile(f)
+
+    for name in names:
+        build_one(parse_name(name))
+    return tables
+
+
+def load_table(path, config):
+    values = array('B')
+    with open(path, "rb") as f:
+        values.frombytes(f.read())
+    if len(values) != TableLayout(config).size:
+        raise ValueError("Kích thước bảng không khớp cấu hình: %s" % path)
+    return values
+
+
+class Tablebase:
+    """Tra bảng tàn cuộc đã dựng; ChessAI gọi probe khi số quân trên bàn đủ ít."""
+
+    def __init__(self, directory=DEFAULT_DIR):
+        self.tables = {}
+        self.layouts = {}
+        self.max_pieces = 0
+        if os.path.isdir(directory):
+            for filename in sorted(os.listdir(directory)):
+                if not filename.endswith(".tb"):
+                    continue
+                config = parse_name(filename[:-3])
+                self.tables[config] = load_table(os.path.join(directory, filename), config)
+                self.layouts[config] = TableLayout(config)
+                self.max_pieces = max(self.max_pieces, len(config))
+        self.probes = 0
+        self.hits = 0
+
+    def probe(self, position):
+        """DTM theo góc nhìn bên đang đi: (dtm, thắng?) hoặc (0, None) nếu hòa; None nếu không có bảng."""
+        self.probes += 1
+        mirror = False
+        config = material_config(position)
+        if config not in self.tables:
+            mirror = True
+            config = material_config(position, mirror=True)
+            if config not in self.tables:
+                return None
+        board = position.board
+        squares = []
+        for code in config:
+            target = -code if mirror else code
+            # Quân cùng loại: lấy lần lượt theo thứ tự ô để không dùng trùng
+            for sq in position.piece_lists[0 if target > 0 else 1]:
+                if board[sq] == target and (mirror_square(sq) if mirror else sq) not in squares:
+                    squares.append(mirror_square(sq) if mirror else sq)
+                    break
+        black_turn = position.red_turn if mirror else not position.red_turn
+        index = self.layouts[config].encode(squares, int(black_turn))
+        if index is None:
+            return None
+        value = self.tables[config][index]
+        self.hits += 1
+        if not value:
+            return 0, None
+        return value - 1, (value - 1) % 2 == 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dựng bảng tàn cuộc (DTM) bằng phân tích ngược")
+    parser.add_argument("names", nargs="*", default=list(DEFAULT_TABLES), help="ví dụ KRK KRKA KRKAB")
+    parser.add_argument("-d", "--directory", default=DEFAULT_DIR)
+    args = parser.parse_args(argv)
+    build(args.names, args.directory)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
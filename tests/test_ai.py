@@ -0,0 +1,36 @@
+import time
+
+from ai import ChessAI, StopCondition, MATE_SCORE, mate_in
+from position import Position
+
+
+def test_mate_in():
+    assert mate_in(123) is None
+    assert mate_in(MATE_SCORE - 1) == 1
+    assert mate_in(MATE_SCORE - 3) == 2
+    assert mate_in(-MATE_SCORE + 2) == -1
+    assert mate_in(-MATE_SCORE) == 0
+
+
+def test_stop_condition_deadline_stops_search():
+    ai = ChessAI(True, 1)
+    ai.stop_event = stop = StopCondition()
+    stop.set_deadline(0.2)
+    start = time.perf_counter()
+    _, move = ai.iterative_deepening(Position.initial(), 64)
+    assert move is not None
+    assert time.perf_counter() - start < 2.0
+    stop.set_deadline(None)
+    assert not stop.is_set()
+
+
+def test_stop_condition_job_token():
+    stop = StopCondition()
+    stop.running_job = 3
+    stop.set_job(3)
+    assert not stop.is_set()
+    # Bên điều khiển hủy trước khi bên tìm kiếm kịp nhận việc: lần chạy với mã cũ phải dừng
+    stop.set_job(4)
+    assert stop.is_set()
+    stop.running_job = 4
+    assert not stop.is_set()
@@ -0,0 +1,32 @@
+import pytest
+
+import analyze
+from perft import REFERENCE_SUITE
+
+
+def test_parse_fen_and_epd_lines():
+    fen, ops = analyze.parse_line("4k4/9/9/9/9/9/9/9/4R4/3K5 w - - 0 1")
+    assert fen == "4k4/9/9/9/9/9/9/9/4R4/3K5 w" and ops == {}
+    fen, ops = analyze.parse_line('4k4/9/9/9/9/9/9/9/4R4/3K5 w - - bm e1e9; id "rook";')
+    assert fen == "4k4/9/9/9/9/9/9/9/4R4/3K5 w" and ops == {"bm": "e1e9", "id": "rook"}
+
+
+def test_result_does_not_depend_on_previous_positions():
+    analyze._init_analyzer(1)
+    fens = [fen for _, fen, _ in REFERENCE_SUITE]
+    forward = [analyze.analyze_position(fen, {}, 3, None, None) for fen in fens]
+    backward = [analyze.analyze_position(fen, {}, 3, None, None) for fen in reversed(fens)][::-1]
+    for result in forward + backward:
+        del result["time"]
+    assert forward == backward
+
+
+def test_explicit_depth_64_is_a_limit(tmp_path, monkeypatch):
+    source = tmp_path / "positions.epd"
+    source.write_text("4k4/9/9/9/9/9/9/9/4R4/3K5 w\n", encoding="utf-8")
+    calls = []
+    monkeypatch.setattr(analyze, "analyze", lambda positions, out, depth, *rest: calls.append(depth) or 0)
+    assert analyze.main([str(source), "-o", str(tmp_path / "out.ndjson"), "-d", "64"]) == 0
+    assert calls == [64]
+    with pytest.raises(SystemExit):
+        analyze.main([str(source)])
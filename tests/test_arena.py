@@ -0,0 +1,24 @@
+import math
+
+import pytest
+
+from arena import elo_difference
+
+
+def test_elo_interval_for_uniform_results():
+    # Thắng hết: điểm ước lượng và cận trên không giới hạn, cận dưới vẫn hữu hạn và dương
+    elo, low, high = elo_difference(10, 0, 0)
+    assert elo == math.inf and high == math.inf
+    assert 0 < low < math.inf
+    # Hòa hết: khoảng không co về độ rộng 0
+    elo, low, high = elo_difference(0, 10, 0)
+    assert elo == 0 and low < -100 and high > 100
+
+
+def test_elo_interval_is_symmetric_and_narrows():
+    elo, low, high = elo_difference(6, 2, 2)
+    assert low < elo < high
+    assert elo_difference(2, 2, 6) == pytest.approx((-elo, -high, -low))
+    _, wide_low, wide_high = elo_difference(6, 2, 2)
+    _, low, high = elo_difference(60, 20, 20)
+    assert wide_low < low and high < wide_high
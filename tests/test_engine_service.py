@@ -0,0 +1,50 @@
+import asyncio
+import json
+
+from engine_service import EngineService
+
+
+async def _serve(lines):
+    service = EngineService(workers=1, queue_size=4, tt_size_mb=1)
+    await service.start()
+    reader = asyncio.StreamReader()
+    reader.feed_data("".join(line + "\n" for line in lines).encode("utf-8"))
+    reader.feed_eof()
+    output = []
+    try:
+        await service.serve_stream(reader, output.append)
+    finally:
+        await service.close()
+    return [json.loads(line) for line in output]
+
+
+def test_every_request_gets_a_reply():
+    replies = asyncio.run(_serve([
+        '{"id": 1, "session": "a", "depth": "x"}',
+        '{"id": 2, "session": "a", "deadline": "soon"}',
+        '{"id": 3, "session": "a", "moves": ["z9z9"], "depth": 1}',
+        'not json',
+        '{"id": 4, "session": "a", "depth": 1}',
+    ]))
+    by_id = {reply.get("id"): reply for reply in replies}
+    assert len(replies) == 5
+    assert by_id[1]["error"].startswith("bad request")
+    assert by_id[2]["error"].startswith("bad request")
+    assert "error" in by_id[3]
+    assert by_id[None]["error"].startswith("bad request")
+    assert by_id[4]["bestmove"] and by_id[4]["depth"] == 1
+
+
+def test_metrics_count_errors():
+    async def run():
+        service = EngineService(workers=1, tt_size_mb=1)
+        await service.start()
+        try:
+            await service.handle({"id": 1, "session": "a", "depth": -3})
+            await service.handle({"id": 2, "session": "a", "depth": 1})
+            return await service.handle({"op": "metrics"})
+        finally:
+            await service.close()
+
+    metrics = asyncio.run(run())
+    assert metrics["errors"] == 1 and metrics["completed"] == 1 and metrics["queue_depth"] == 0
@@ -0,0 +1,58 @@
+import random
+
+import game_record
+from game_record import RED_WIN, DRAW, UNKNOWN, append_game, read_games, replay
+from game_state import GameState
+from pieces import PieceData
+from position import Position
+
+
+def random_games(count, seed=1):
+    rng = random.Random(seed)
+    for number in range(count):
+        position = Position.initial()
+        start = None
+        if number % 3 == 0:
+            for _ in range(4):
+                position.make_move(rng.choice(position.generate_legal_moves()))
+            start = Position.unpack(position.pack())
+        moves = []
+        for _ in range(rng.randrange(0, 40)):
+            legal = position.generate_legal_moves()
+            if not legal:
+                break
+            move = rng.choice(legal)
+            moves.append(move)
+            position.make_move(move)
+        yield start, moves, (RED_WIN, DRAW)[number % 2]
+
+
+def test_streaming_across_chunk_boundaries(tmp_path, monkeypatch):
+    path = str(tmp_path / "games.xqr")
+    games = list(random_games(30))
+    for start, moves, result in games:
+        append_game(path, moves, result, start)
+    # Khối đọc rất nhỏ (kể cả số lẻ byte) để đầu ván, thế cờ nén và nước đi đều bị cắt ngang giữa hai khối
+    for chunk in (1, 3, 7, 64):
+        monkeypatch.setattr(game_record, "READ_CHUNK", chunk)
+        read = list(read_games(path))
+        assert len(read) == len(games)
+        for (start, moves, result), (read_start, read_moves, read_result) in zip(games, read):
+            assert read_start == (start.pack() if start is not None else None)
+            assert list(read_moves) == moves
+            assert read_result == result
+    assert sum(1 for _ in replay(path)) == sum(len(moves) for _, moves, _ in games)
+
+
+def test_unfinished_games_are_not_saved(tmp_path):
+    path = str(tmp_path / "games.xqr")
+    black_pieces, red_pieces = PieceData.get_initial_pieces()
+    state = GameState(red_pieces, black_pieces)
+    state.record_move((1, 9), (2, 7), red_pieces[(1, 9)])
+    assert state.result == UNKNOWN
+    state.save(path)
+    assert not (tmp_path / "games.xqr").exists()
+    state.save(path, unfinished=True)
+    state.set_winner(True)
+    state.save(path)
+    assert [(len(moves), result) for _, moves, result in read_games(path)] == [(1, UNKNOWN), (1, RED_WIN)]
@@ -0,0 +1,18 @@
+from game_state import GameState
+from move_validator import MoveValidator
+
+
+def test_side_is_passed_explicitly():
+    # 車 dùng chung ký tự cho hai bên: bên lấy từ tham số. Xe Đen bị ghim trên cột e (lộ mặt tướng nếu rời cột)
+    red = {(4, 9): "帥", (0, 9): "車"}
+    black = {(4, 0): "將", (4, 5): "車"}
+    moves = MoveValidator.generate_legal_moves("車", (4, 5), black, red, False)
+    assert moves and all(x == 4 for x, _ in moves)
+
+
+def test_checkmate_uses_side_to_move():
+    red = {(4, 9): "帥", (3, 1): "車", (5, 1): "車"}
+    black = {(4, 0): "將"}
+    state = GameState(red, black)
+    state.red_turn = False
+    assert state.is_checkmate()
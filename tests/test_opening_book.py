@@ -0,0 +1,37 @@
+import random
+
+from game_record import RED_WIN, DRAW, append_game
+from opening_book import OpeningBook, build_book, read_record_games
+from position import Position, iccs_to_move
+
+
+def moves(*texts):
+    return [iccs_to_move(text) for text in texts]
+
+
+def test_build_probe_choose(tmp_path):
+    record = str(tmp_path / "games.xqr")
+    append_game(record, moves("h2e2", "h9g7", "h0g2"), RED_WIN)
+    append_game(record, moves("h2e2", "b9c7"), DRAW)
+    path = str(tmp_path / "book.bin")
+    assert build_book(read_record_games(record), path) == 4
+
+    book = OpeningBook(path)
+    try:
+        start = Position.initial()
+        assert book.probe(start.key) == [(iccs_to_move("h2e2"), 2)]
+        assert book.choose(start) == iccs_to_move("h2e2")
+
+        start.make_move(iccs_to_move("h2e2"))
+        assert sorted(book.probe(start.key)) == sorted([(iccs_to_move("h9g7"), 1), (iccs_to_move("b9c7"), 1)])
+        rng = random.Random(3)
+        for _ in range(10):
+            assert book.choose(start, rng) in start.generate_legal_moves()
+
+        # Thế cờ không có trong sách
+        other = Position.initial()
+        other.make_move(iccs_to_move("b0c2"))
+        assert book.probe(other.key) == []
+        assert book.choose(other) == 0
+    finally:
+        book.close()
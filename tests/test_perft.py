@@ -0,0 +1,18 @@
+import pytest
+
+from bitboard import Bitboards
+from perft import REFERENCE_SUITE, perft
+from position import Position
+
+
+@pytest.mark.parametrize("name, fen, expected", REFERENCE_SUITE, ids=[case[0] for case in REFERENCE_SUITE])
+def test_reference_counts(name, fen, expected):
+    position = Position.from_fen(fen)
+    for depth, nodes in enumerate(expected[:3], start=1):
+        assert perft(position, depth) == nodes
+
+
+@pytest.mark.parametrize("name, fen, expected", REFERENCE_SUITE, ids=[case[0] for case in REFERENCE_SUITE])
+def test_bitboard_counts_match(name, fen, expected):
+    bitboards = Bitboards.from_position(Position.from_fen(fen))
+    assert perft(bitboards, 2) == expected[1]
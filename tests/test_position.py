@@ -0,0 +1,107 @@
+import random
+
+from evaluation import evaluate
+from perft import REFERENCE_SUITE
+from position import Position, START_FEN, iccs_to_move
+
+
+def random_positions(count, seed=7):
+    rng = random.Random(seed)
+    for _ in range(count):
+        position = Position.from_fen(rng.choice(REFERENCE_SUITE)[1])
+        for _ in range(rng.randrange(0, 30)):
+            moves = position.generate_legal_moves()
+            if not moves:
+                break
+            position.make_move(rng.choice(moves))
+        yield position
+
+
+def same_position(a, b):
+    return list(a.board) == list(b.board) and a.red_turn == b.red_turn and a.key == b.key
+
+
+def incremental_terms(position):
+    return position.key, position.mg, position.eg, position.phase
+
+
+def mirror_fen(fen):
+    """Đổi màu hai bên: lật hàng trên xuống dưới, đổi hoa/thường và đổi bên đi."""
+    board, side = fen.split()[:2]
+    return "%s %s" % ("/".join(reversed(board.split("/"))).swapcase(), "b" if side == "w" else "w")
+
+
+def test_start_fen():
+    assert Position.initial().to_fen() == START_FEN
+    assert same_position(Position.from_fen(START_FEN), Position.initial())
+
+
+def test_fen_round_trip():
+    for position in random_positions(200):
+        fen = position.to_fen()
+        assert same_position(Position.from_fen(fen), position)
+        assert Position.from_fen(fen).to_fen().split()[:2] == fen.split()[:2]
+
+
+def test_pack_round_trip():
+    for position in random_positions(200):
+        data = position.pack()
+        assert len(data) == 46
+        assert same_position(Position.unpack(data), position)
+
+
+def test_to_bytes_round_trip_keeps_history():
+    for position in random_positions(100):
+        copy = Position.from_bytes(position.to_bytes())
+        assert same_position(copy, position)
+        assert list(copy.history) == list(position.history)
+        assert copy.repetition_count() == position.repetition_count()
+
+
+def test_incremental_terms_match_recompute():
+    rng = random.Random(11)
+    for _, fen, _ in REFERENCE_SUITE:
+        position = Position.from_fen(fen)
+        undo = []
+        for _ in range(60):
+            moves = position.generate_legal_moves()
+            if not moves:
+                break
+            move = rng.choice(moves)
+            undo.append((move, position.make_move(move), incremental_terms(position)))
+            assert incremental_terms(position) == incremental_terms(Position.from_fen(position.to_fen()))
+        for move, captured, terms in reversed(undo):
+            assert incremental_terms(position) == terms
+            position.unmake_move(move, captured)
+        assert incremental_terms(position) == incremental_terms(Position.from_fen(fen))
+
+
+def test_evaluation_colour_mirror_symmetric():
+    assert evaluate(Position.initial()) == 0
+    for position in random_positions(200):
+        mirror = Position.from_fen(mirror_fen(position.to_fen()))
+        assert (mirror.mg, mirror.eg, mirror.phase) == (-position.mg, -position.eg, position.phase)
+        assert evaluate(mirror) == -evaluate(position)
+
+
+def test_repetition_stops_at_irreversible_moves():
+    position = Position.initial()
+    for text in ("b0c2", "b9c7", "c2b0", "c7b9", "b0c2", "b9c7", "c2b0", "c7b9"):
+        position.make_move(iccs_to_move(text))
+    assert position.repetition_count() == 2 and position.is_repetition()
+    position.make_move(iccs_to_move("a3a4"))
+    assert position.irreversible[-1] == len(position.history)
+    for text in ("b9c7", "b0c2", "c7b9", "c2b0"):
+        position.make_move(iccs_to_move(text))
+    assert position.repetition_count() == 1 and position.is_repetition()
+    copy = Position.from_bytes(position.to_bytes())
+    assert copy.irreversible[-1] == position.irreversible[-1]
+    assert copy.repetition_count() == 1
+
+
+def test_repetition_count_matches_full_scan():
+    for position in random_positions(100):
+        history, key = position.history, position.key
+        full = sum(1 for i in range(len(history) - 2, -1, -2) if history[i] == key)
+        assert position.repetition_count() == full
+        assert position.is_repetition() == (full > 0)
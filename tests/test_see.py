@@ -0,0 +1,31 @@
+from position import Position, iccs_to_move
+from see import static_exchange
+
+
+def see(fen, text):
+    position = Position.from_fen(fen)
+    board = list(position.board)
+    value = static_exchange(position, iccs_to_move(text))
+    assert list(position.board) == board
+    return value
+
+
+def test_defended_pawn_loses_the_rook():
+    # Xe ăn tốt được xe đen giữ: 30 - 600
+    assert see("r4k3/9/9/9/p8/9/9/9/R8/3K5 w", "a1a5") == -570
+
+
+def test_blocked_horse_leg_does_not_defend():
+    assert see("5k3/9/1n7/9/p8/9/9/9/R8/3K5 w", "a1a5") == -570
+    # Chân mã ở b6 bị chặn nên mã không ăn lại được
+    assert see("5k3/9/1n7/1P7/p8/9/9/9/R8/3K5 w", "a1a5") == 30
+
+
+def test_cannon_captures_over_a_screen():
+    # Pháo nhảy qua ngòi e3 ăn xe, tốt đen ăn lại pháo: 600 - 285
+    assert see("5k3/4p4/4r4/9/9/9/4P4/4C4/9/3K5 w", "e2e7") == 315
+
+
+def test_x_ray_recapture_behind_the_cannon():
+    # Pháo e1 lấy xe e3 làm ngòi ăn trước, mã đen ăn lại, rồi xe ăn lại mã: 600 - 285 + 270
+    assert see("5k3/9/3n5/9/4r4/9/4R4/9/4C4/3K5 w", "e1e5") == 585
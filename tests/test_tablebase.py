@@ -0,0 +1,22 @@
+import pytest
+
+from position import Position
+from tablebase import TableLayout, Tablebase, parse_name
+
+
+def test_encode_rejects_piece_outside_region():
+    layout = TableLayout(parse_name("KRKA"))
+    # Tướng Đỏ e0, Xe a0, Tướng Đen e9, Sĩ Đen ở a5 (ngoài các ô Sĩ)
+    squares = [9 * 9 + 4, 9 * 9 + 0, 4, 4 * 9 + 0]
+    assert layout.encode(squares, 0) is None
+    squares[3] = 3  # d9 là ô Sĩ hợp lệ
+    index = layout.encode(squares, 1)
+    assert layout.decode(index) == (squares, 1)
+
+
+def test_probe_skips_off_region_position():
+    tablebase = Tablebase()
+    if parse_name("KRKA") not in tablebase.tables:
+        pytest.skip("chưa dựng bảng KRKA trong assets/tablebases")
+    assert tablebase.probe(Position.from_fen("4k4/9/9/9/a8/9/9/9/9/R3K4 w")) is None
+    assert tablebase.probe(Position.from_fen("3ak4/9/9/9/9/9/9/9/9/R3K4 w")) is not None
@@ -0,0 +1,43 @@
+import io
+import time
+
+from position import iccs_to_move
+from ucci import Engine
+
+
+def bestmoves(out):
+    return [line for line in out.getvalue().splitlines() if line.startswith("bestmove")]
+
+
+def test_scripted_session():
+    out = io.StringIO()
+    engine = Engine(out)
+    for line in ("ucci", "setoption usebook false", "isready", "position startpos moves h2e2 h9g7"):
+        assert engine.handle(line)
+    lines = out.getvalue().splitlines()
+    assert lines[0] == "id name Chess_AI"
+    assert "ucciok" in lines and lines[-1] == "readyok"
+
+    engine.handle("go depth 3")
+    engine.thread.join(30)
+    engine.handle("stop")
+    assert any(line.startswith("info depth 3 ") and " pv " in line for line in out.getvalue().splitlines())
+    [line] = bestmoves(out)
+    _, move, ponder, reply = line.split()
+    position = engine.position.copy()
+    assert ponder == "ponder"
+    assert iccs_to_move(move) in position.generate_legal_moves()
+    position.make_move(iccs_to_move(move))
+    assert iccs_to_move(reply) in position.generate_legal_moves()
+
+    # Nghĩ trước: chưa được gửi bestmove cho đến khi có ponderhit
+    engine.handle("go ponder movetime 300")
+    time.sleep(0.5)
+    assert len(bestmoves(out)) == 1
+    engine.handle("ponderhit")
+    engine.thread.join(30)
+    assert len(bestmoves(out)) == 2
+    assert bestmoves(out)[-1].split()[2] == "ponder"
+
+    assert not engine.handle("quit")
+    assert out.getvalue().splitlines()[-1] == "bye"
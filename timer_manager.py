@@ -32,6 +32,10 @@ class TimerManager:
     def get_times(self):
         return self.red_time, self.black_time
 
+    def move_budget(self, is_red, moves_to_go=30):  # Time the given side may spend on its next move
+        remaining = self.red_time if is_red else self.black_time
+        return max(0.0, remaining) / moves_to_go
+
     def get_turn(self):
         return self.red_turn
 
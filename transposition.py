@@ -0,0 +1,147 @@
+from array import array
+from multiprocessing import shared_memory
+
+# Loại cận của điểm lưu trong bảng (0 = ô trống)
+EXACT, LOWER, UPPER = 1, 2, 3
+
+# Mỗi mục: khóa 8 byte + độ sâu 1 + điểm 4 + loại cận 1 + nước đi 2 = 16 byte
+ENTRY_BYTES = 16
+BUCKET_SIZE = 2  # Ô 0: ưu tiên độ sâu, ô 1: luôn ghi đè
+
+
+class TranspositionTable:
+    """Bảng chuyển vị kích thước cố định, cấp phát sẵn bằng các mảng song song."""
+
+    def __init__(self, size_mb=16):
+        self.size_mb = size_mb
+        self.num_buckets = max(1, size_mb * 1024 * 1024 // (ENTRY_BYTES * BUCKET_SIZE))
+        entries = self.num_buckets * BUCKET_SIZE
+        self.keys = array('Q', bytes(8 * entries))
+        self.depths = array('b', bytes(entries))
+        self.scores = array('i', bytes(4 * entries))
+        self.flags = array('B', bytes(entries))
+        self.moves = array('H', bytes(2 * entries))
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def clear(self):
+        entries = self.num_buckets * BUCKET_SIZE
+        self.flags = array('B', bytes(entries))
+        self.probes = self.hits = self.stores = 0
+
+    def probe(self, key):
+        """Trả về (depth, score, flag, move) nếu có mục khớp khóa, ngược lại None."""
+        self.probes += 1
+        index = (key % self.num_buckets) * BUCKET_SIZE
+        for slot in (index, index + 1):
+            if self.flags[slot] and self.keys[slot] == key:
+                self.hits += 1
+                return self.depths[slot], self.scores[slot], self.flags[slot], self.moves[slot]
+        return None
+
+    def store(self, key, depth, score, flag, move):
+        self.stores += 1
+        index = (key % self.num_buckets) * BUCKET_SIZE
+        # Ô ưu tiên độ sâu chỉ bị thay khi trống, cùng thế cờ, hoặc kết quả mới sâu hơn
+        if not self.flags[index] or self.keys[index] == key or depth >= self.depths[index]:
+            slot = index
+        else:
+            slot = index + 1
+        if self.keys[slot] == key and self.flags[slot] and not move:
+            move = self.moves[slot]  # Giữ nước đi tốt nhất cũ nếu lần này không có
+        self.keys[slot] = key
+        self.depths[slot] = depth
+        self.scores[slot] = score
+        self.flags[slot] = flag
+        self.moves[slot] = move
+
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+
+# Bảng dùng chung: mỗi mục là 2 số 64 bit (khóa ^ dữ liệu, dữ liệu). Dữ liệu gói nước đi 16 bit,
+# loại cận 8 bit, độ sâu 8 bit và điểm 32 bit. Ghi đè không khóa có thể bị xé đôi giữa hai tiến trình,
+# nhưng khi đó khóa ^ dữ liệu không còn khớp nên mục đó đơn giản là bị bỏ qua.
+SHARED_ENTRY_WORDS = 2
+
+
+def _pack(depth, score, flag, move):
+    return move | (flag << 16) | ((depth & 0xFF) << 24) | ((score & 0xFFFFFFFF) << 32)
+
+
+def _unpack(data):
+    depth = (data >> 24) & 0xFF
+    score = data >> 32
+    return (depth - 256 if depth >= 128 else depth,
+            score - (1 << 32) if score >= (1 << 31) else score,
+            (data >> 16) & 0xFF, data & 0xFFFF)
+
+
+class SharedTranspositionTable:
+    """Bảng chuyển vị trên multiprocessing.shared_memory, các tiến trình tìm kiếm cùng đọc/ghi không cần khóa.
+
+    Cùng giao diện probe/store với TranspositionTable. Tiến trình tạo bảng gọi close(unlink=True) khi xong,
+    các tiến trình con mở lại bằng attach(name, size_mb).
+    """
+
+    def __init__(self, size_mb=16, name=None):
+        self.size_mb = size_mb
+        self.num_buckets = max(1, size_mb * 1024 * 1024 // (ENTRY_BYTES * BUCKET_SIZE))
+        size = self.num_buckets * BUCKET_SIZE * SHARED_ENTRY_WORDS * 8
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self.words = self.shm.buf.cast('Q')
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    @classmethod
+    def attach(cls, name, size_mb):
+        return cls(size_mb, name)
+
+    def close(self, unlink=False):
+        self.words.release()
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+    def clear(self):
+        self.shm.buf[:] = bytes(len(self.shm.buf))
+        self.probes = self.hits = self.stores = 0
+
+    def probe(self, key):
+        """Trả về (depth, score, flag, move) nếu có mục khớp khóa, ngược lại None."""
+        self.probes += 1
+        words = self.words
+        index = (key % self.num_buckets) * BUCKET_SIZE * SHARED_ENTRY_WORDS
+        for slot in (index, index + SHARED_ENTRY_WORDS):
+            data = words[slot + 1]
+            if data and words[slot] ^ data == key:
+                self.hits += 1
+                return _unpack(data)
+        return None
+
+    def store(self, key, depth, score, flag, move):
+        self.stores += 1
+        words = self.words
+        index = (key % self.num_buckets) * BUCKET_SIZE * SHARED_ENTRY_WORDS
+        data = words[index + 1]
+        # Ô ưu tiên độ sâu chỉ bị thay khi trống, cùng thế cờ, hoặc kết quả mới sâu hơn
+        if not data or words[index] ^ data == key or depth >= _unpack(data)[0]:
+            slot = index
+        else:
+            slot = index + SHARED_ENTRY_WORDS
+        if not move:
+            old = words[slot + 1]
+            if old and words[slot] ^ old == key:
+                move = old & 0xFFFF  # Giữ nước đi tốt nhất cũ nếu lần này không có
+        data = _pack(depth, score, flag, move)
+        words[slot] = key ^ data
+        words[slot + 1] = data
+
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
@@ -0,0 +1,238 @@
+import sys
+import threading
+import time
+
+from ai import ChessAI, StopCondition, MAX_DEPTH, mate_in, principal_variation
+from opening_book import OpeningBook
+from position import Position, iccs_to_move, move_to_iccs
+
+# Giao thức văn bản kiểu UCCI/UCI qua stdin/stdout để nối engine với giao diện cờ tướng và trình tổ chức giải,
+# không cần pygame. Tìm kiếm chạy trong luồng riêng nên "stop", "ponderhit", "isready" được trả lời ngay.
+
+ENGINE_NAME = "Chess_AI"
+DEFAULT_HASH_MB = 16
+DEFAULT_MOVES_TO_GO = 30
+MOVE_OVERHEAD = 0.05  # Giây trừ hao cho độ trễ giao tiếp
+
+
+def time_budget(remaining, increment=0.0, moves_to_go=None):
+    """Thời gian (giây) cho nước này: chia đều thời gian còn lại như TimerManager.move_budget, cộng thời gian cộng thêm."""
+    budget = remaining / (moves_to_go or DEFAULT_MOVES_TO_GO) + increment
+    return max(0.01, min(budget, remaining / 2) - MOVE_OVERHEAD)
+
+
+class Engine:
+    def __init__(self, out=sys.stdout):
+        self.out = out
+        self.output_lock = threading.Lock()
+        self.protocol = "ucci"
+        self.hash_mb = DEFAULT_HASH_MB
+        self.use_book = True
+        self.book = None
+        self.ai = ChessAI(True, self.hash_mb)
+        self.position = Position.initial()
+        self.stop = StopCondition()
+        self.ai.stop_event = self.stop
+        self.release = threading.Event()  # Được gửi bestmove (chế độ ponder/infinite phải chờ stop hoặc ponderhit)
+        self.ponder_budget = None  # Thời gian dùng khi ponderhit
+        self.thread = None
+        self.search_start = 0.0
+
+    def send(self, line):
+        with self.output_lock:
+            self.out.write(line + "\n")
+            self.out.flush()
+
+    # ===== Lệnh =====
+    def handle(self, line):
+        """Xử lý một dòng lệnh; trả về False khi nhận quit."""
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+        if command in ("ucci", "uci"):
+            self.protocol = command
+            self.send("id name %s" % ENGINE_NAME)
+            self.send("id author giang2011-ai")
+            if command == "ucci":
+                self.send("option hashsize type spin min 1 max 1024 default %d" % DEFAULT_HASH_MB)
+                self.send("option usebook type check default true")
+            else:
+                self.send("option name Hash type spin default %d min 1 max 1024" % DEFAULT_HASH_MB)
+                self.send("option name OwnBook type check default true")
+            self.send(command + "ok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "setoption":
+            self.set_option(args)
+        elif command in ("ucinewgame", "newgame"):
+            self.wait()
+            self.ai.tt.clear()
+        elif command == "position":
+            self.set_position(args)
+        elif command == "go":
+            self.go(args)
+        elif command == "stop":
+            self.stop.event.set()
+            self.release.set()
+        elif command == "ponderhit":
+            self.ponder_hit()
+        elif command == "quit":
+            self.wait()
+            if self.protocol == "ucci":
+                self.send("bye")
+            return False
+        return True
+
+    def set_option(self, args):
+        # UCCI: "setoption hashsize 32"; UCI: "setoption name Hash value 32"
+        if args and args[0] == "name":
+            name, _, value = " ".join(args[1:]).partition(" value ")
+        else:
+            name, value = (args[0] if args else ""), " ".join(args[1:])
+        name = name.strip().lower()
+        value = value.strip().lower()
+        self.wait()
+        if name in ("hash", "hashsize") and value.isdigit():
+            self.hash_mb = max(1, int(value))
+            self.ai = ChessAI(True, self.hash_mb)
+            self.ai.stop_event = self.stop
+        elif name in ("ownbook", "usebook"):
+            self.use_book = value in ("true", "on", "1")
+
+    def set_position(self, args):
+        """position (fen FEN | startpos) [moves m1 m2 ...]"""
+        if "moves" in args:
+            index = args.index("moves")
+            args, moves = args[:index], args[index + 1:]
+        else:
+            moves = []
+        try:
+            if args and args[0] == "fen":
+                position = Position.from_fen(" ".join(args[1:]))
+            else:
+                position = Position.initial()
+            for text in moves:
+                move = iccs_to_move(text)
+                if move not in position.generate_legal_moves():
+                    raise ValueError("nước đi không hợp lệ %s" % text)
+                position.make_move(move)
+        except (ValueError, KeyError, IndexError) as error:
+            self.send("info string %s" % error)
+            return
+        self.position = position
+
+    def go(self, args):
+        """go [ponder|infinite] [depth d] [nodes n] [movetime ms] [wtime ms btime ms winc ms binc ms movestogo n]
+        [time ms increment ms] (UCCI, thời gian của bên đang đi)."""
+        self.wait()
+        options = {}
+        flags = set()
+        i = 0
+        while i < len(args):
+            if args[i] in ("ponder", "infinite", "draw"):
+                flags.add(args[i])
+                i += 1
+            elif i + 1 < len(args):
+                try:
+                    options[args[i]] = int(args[i + 1])
+                except ValueError:
+                    pass
+                i += 2
+            else:
+                i += 1
+
+        position = self.position.copy()
+        red = position.red_turn
+        budget = None
+        if "movetime" in options:
+            budget = max(0.01, options["movetime"] / 1000 - MOVE_OVERHEAD)
+        elif "time" in options:
+            budget = time_budget(options["time"] / 1000, options.get("increment", 0) / 1000, options.get("movestogo"))
+        elif ("wtime" if red else "btime") in options:
+            budget = time_budget(options["wtime" if red else "btime"] / 1000,
+                                 options.get("winc" if red else "binc", 0) / 1000, options.get("movestogo"))
+        depth = min(options.get("depth", MAX_DEPTH), MAX_DEPTH)
+        waiting = "ponder" in flags or "infinite" in flags
+
+        if self.use_book and not waiting:
+            if self.book is None:
+                self.book = OpeningBook.open_default()
+            move = self.book.choose(position) if self.book is not None else 0
+            if move:
+                self.send("bestmove %s" % move_to_iccs(move))
+                return
+
+        self.stop.event.clear()
+        self.stop.set_deadline(None if waiting else budget)
+        self.ponder_budget = budget if "ponder" in flags else None
+        if waiting:
+            self.release.clear()
+        else:
+            self.release.set()
+        self.search_start = time.perf_counter()
+        self.thread = threading.Thread(target=self._search, args=(position, depth, options.get("nodes")),
+                                       daemon=True)
+        self.thread.start()
+
+    def ponder_hit(self):
+        """Đối thủ đi đúng nước đoán: lần nghĩ trước thành lần tìm kiếm thật, giờ mới bắt đầu tính giờ."""
+        if self.ponder_budget is not None:
+            self.stop.set_deadline(self.ponder_budget)
+            self.ponder_budget = None
+        self.release.set()
+
+    def wait(self):
+        """Dừng và chờ lần tìm kiếm đang chạy (nếu có) gửi xong bestmove."""
+        if self.thread is not None:
+            self.stop.event.set()
+            self.release.set()
+            self.thread.join()
+            self.thread = None
+
+    # ===== Tìm kiếm (luồng riêng) =====
+    def format_score(self, score):
+        if self.protocol == "uci":
+            mate = mate_in(score)
+            return "cp %d" % score if mate is None else "mate %d" % mate
+        return "%d" % score
+
+    def _search(self, position, depth, node_limit):
+        ai = self.ai
+
+        def report(completed, score, move):
+            elapsed = time.perf_counter() - self.search_start
+            pv = principal_variation(ai, position, move, completed)
+            line = "info depth %d score %s time %d nodes %d nps %d" % (
+                completed, self.format_score(score), elapsed * 1000, ai.nodes, ai.nodes / elapsed if elapsed > 0 else 0)
+            if pv:
+                line += " pv " + " ".join(move_to_iccs(m) for m in pv)
+            self.send(line)
+
+        ai.on_iteration = report
+        try:
+            _, best_move = ai.iterative_deepening(position, depth, None, node_limit)
+            pv = principal_variation(ai, position, best_move, 2)
+        finally:
+            ai.on_iteration = None
+        # Ở chế độ ponder/infinite chỉ gửi bestmove sau stop hoặc ponderhit
+        self.release.wait()
+        if best_move is None:
+            self.send("nobestmove" if self.protocol == "ucci" else "bestmove (none)")
+        elif len(pv) > 1:
+            self.send("bestmove %s ponder %s" % (move_to_iccs(pv[0]), move_to_iccs(pv[1])))
+        else:
+            self.send("bestmove %s" % move_to_iccs(best_move))
+
+
+def main():
+    engine = Engine()
+    for line in sys.stdin:
+        if not engine.handle(line.strip()):
+            break
+    engine.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
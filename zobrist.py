@@ -0,0 +1,23 @@
+import random
+
+from pieces import NUM_SQUARES
+
+# Khóa Zobrist 64 bit cho mỗi (mã quân, ô) và cho lượt đi của Đen.
+# Dùng seed cố định để khóa giống nhau giữa các lần chạy (cần cho sách khai cuộc, bảng chuyển vị dùng chung).
+_rng = random.Random(0x5EED1234)
+
+# PIECE_KEYS[code + 7][sq], code trong -7..7 (hàng code = 0 luôn bằng 0)
+PIECE_KEYS = tuple(
+    tuple(0 if code == 0 else _rng.getrandbits(64) for _ in range(NUM_SQUARES))
+    for code in range(-7, 8))
+SIDE_KEY = _rng.getrandbits(64)
+
+
+def compute_key(board, red_turn):
+    """Tính lại khóa Zobrist từ đầu (chỉ dùng khi tạo thế cờ hoặc để kiểm tra)."""
+    key = 0 if red_turn else SIDE_KEY
+    for sq in range(NUM_SQUARES):
+        code = board[sq]
+        if code:
+            key ^= PIECE_KEYS[code + 7][sq]
+    return key